@@ -5,21 +5,44 @@ Updated with dual-type support and expanded model selection.
 """
 
 import streamlit as st
-import pandas as pd
-import json
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import orjson
 import io
 import zipfile
+import hashlib
+import asyncio
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urlparse
+from anthropic import AsyncAnthropic
 
 from processor import (
-    parse_csv, extract_domain, assign_types, build_service_hierarchy,
-    build_location_relationships, fetch_page, format_page_data_for_prompt,
-    get_csv_overrides, get_primary_entity_type,
+    parse_csv, assign_types, build_service_hierarchy, clear_page_cache,
+    build_location_relationships, fetch_page, fetch_all, format_page_data_for_prompt,
+    format_hierarchy_for_prompt, get_csv_overrides, get_primary_entity_type, group_wiring_chunks,
+)
+from generator import (
+    AsyncRateLimiter, find_wiring_violations, wire_graph_locally, generate_jsonld_for_row_async,
+    generate_jsonld_batch, graph_wiring_pass_async, WIRING_MODEL,
 )
-from generator import generate_jsonld_for_row, graph_wiring_pass
 from validator import validate_jsonld, generate_validation_report
 
+GENERATION_CONCURRENCY = 8
+GENERATION_RPM = 50
+VALIDATION_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+STREAM_UI_INTERVAL = 0.25  # seconds between live streaming-progress updates
+CSV_BATCH_ROWS = 500
+MODEL_LABELS = {
+    "claude-sonnet-4-20250514": "Claude Sonnet 4 (recommended)",
+    "claude-opus-4-6": "Claude Opus 4.6 (highest quality)",
+    "claude-sonnet-4-5-20250929": "Claude Sonnet 4.5",
+    "claude-haiku-4-5-20251001": "Claude Haiku 4.5 (fastest, cheapest)",
+}
+CSV_SCHEMA = pa.schema([(name, pa.string()) for name in
+                        ("URL", "SchemaType", "Mode", "Validation", "Issues", "JSON-LD")])
+
 st.set_page_config(
     page_title="Bulk Structured Data Generator",
     page_icon="🔗",
@@ -51,6 +74,24 @@ def get_api_key():
         pass
     return st.session_state.get("api_key", "")
 
+# ─── Cached Pipeline Steps ───────────────────────────────────────────────────
+
+@st.cache_data(show_spinner=False)
+def cached_parse_and_type(content_hash, _content):
+    """Parse and type the uploaded CSV. Keyed by content hash so reruns skip the work."""
+    rows = parse_csv(_content)
+    return assign_types(rows) if rows else rows
+
+
+@st.cache_data(show_spinner=False)
+def cached_service_hierarchy(content_hash, _rows):
+    return build_service_hierarchy(_rows)
+
+
+@st.cache_data(show_spinner=False)
+def cached_location_relationships(content_hash, _rows):
+    return build_location_relationships(_rows)
+
 # ─── Sidebar ─────────────────────────────────────────────────────────────────
 
 with st.sidebar:
@@ -76,18 +117,8 @@ with st.sidebar:
     # Model selection — expanded with Opus
     model = st.selectbox(
         "Claude Model",
-        options=[
-            "claude-sonnet-4-20250514",
-            "claude-opus-4-6",
-            "claude-sonnet-4-5-20250929",
-            "claude-haiku-4-5-20251001",
-        ],
-        format_func=lambda x: {
-            "claude-sonnet-4-20250514": "Claude Sonnet 4 (recommended)",
-            "claude-opus-4-6": "Claude Opus 4.6 (highest quality)",
-            "claude-sonnet-4-5-20250929": "Claude Sonnet 4.5",
-            "claude-haiku-4-5-20251001": "Claude Haiku 4.5 (fastest, cheapest)",
-        }.get(x, x),
+        options=list(MODEL_LABELS),
+        format_func=lambda x: MODEL_LABELS.get(x, x),
         index=0,
         help="Sonnet 4 is the best balance of quality and speed. Opus 4.6 is the most capable but slower and more expensive.",
     )
@@ -95,7 +126,23 @@ with st.sidebar:
     st.divider()
     st.subheader("Processing Options")
     fetch_pages = st.checkbox("Fetch page content", value=True)
-    run_graph_wiring = st.checkbox("Graph wiring pass", value=True)
+    force_refresh = st.checkbox("Force refresh pages", value=False,
+        help="Bypass the page cache and re-download every page.")
+    if st.button("Clear page cache", use_container_width=True):
+        clear_page_cache()
+        st.toast("Page cache cleared.")
+    run_graph_wiring = st.checkbox("LLM graph wiring fallback", value=False,
+        help="Send blocks the local wiring pass could not fix (e.g. unresolved @id references) to the model.")
+    wiring_model = st.selectbox(
+        "Wiring model",
+        options=list(MODEL_LABELS),
+        format_func=lambda x: MODEL_LABELS.get(x, x),
+        index=list(MODEL_LABELS).index(WIRING_MODEL),
+        disabled=not run_graph_wiring,
+        help="Wiring is a mechanical fix-up, so Haiku is usually enough.",
+    )
+    use_batch_api = st.checkbox("Use Batch API (cheaper, slower)", value=False,
+        help="Submit all rows as one Message Batch at half the token price. Results can take minutes to hours.")
     skip_org_discovery = st.checkbox("Skip homepage discovery", value=False)
 
     st.divider()
@@ -136,30 +183,23 @@ if not uploaded_file:
 
 # ─── Parse & Preview ─────────────────────────────────────────────────────────
 
-raw_content = uploaded_file.read()
-rows = parse_csv(raw_content)
+raw_content = uploaded_file.getvalue()
+content_hash = hashlib.blake2b(raw_content, digest_size=16).hexdigest()
+rows = cached_parse_and_type(content_hash, raw_content)
 
 if not rows:
     st.error("No valid rows found. Make sure your CSV has a 'URL' column.")
     st.stop()
 
-rows = assign_types(rows)
-
 st.subheader("2. Review Detected Types")
 
-preview_data = []
-for r in rows:
-    type_display = r["_inferred_type"]
-    mode = "Dual" if r["_is_dual"] else "Single"
-    preview_data.append({
-        "URL": r["URL"],
-        "Schema Type(s)": type_display,
-        "Mode": mode,
-        "Confidence": r["_type_confidence"],
-    })
-
-preview_df = pd.DataFrame(preview_data)
-st.dataframe(preview_df, use_container_width=True, hide_index=True)
+preview_table = pa.table({
+    "URL": [r["URL"] for r in rows],
+    "Schema Type(s)": [r["_inferred_type"] for r in rows],
+    "Mode": ["Dual" if r["_is_dual"] else "Single" for r in rows],
+    "Confidence": [r["_type_confidence"] for r in rows],
+})
+st.dataframe(preview_table, use_container_width=True, hide_index=True)
 
 # Dual-type summary
 dual_count = sum(1 for r in rows if r["_is_dual"])
@@ -167,8 +207,8 @@ single_count = len(rows) - dual_count
 if dual_count > 0:
     st.info(f"📊 **{single_count}** single-type rows, **{dual_count}** dual-type rows (WebContent + nested entity)")
 
-# Hierarchy
-hierarchy = build_service_hierarchy(rows)
+# Hierarchy (computed once per CSV and reused by the generation phases)
+hierarchy = cached_service_hierarchy(content_hash, rows)
 if hierarchy:
     with st.expander("🌳 Service Hierarchy"):
         for url, info in hierarchy.items():
@@ -177,7 +217,7 @@ if hierarchy:
             siblings_label = f" ↔ siblings: {len(info['siblings'])}" if info["siblings"] else ""
             st.text(f"{indent}{'├── ' if info['depth'] > 1 else ''}{url}{parent_label}{siblings_label}")
 
-loc_rels = build_location_relationships(rows)
+loc_rels = cached_location_relationships(content_hash, rows)
 if loc_rels["location_urls"]:
     with st.expander("📍 Location Relationships"):
         st.text(f"Organization: {loc_rels['org_url']}")
@@ -194,13 +234,14 @@ if not api_key_valid:
 
 if st.button("🚀 Generate JSON-LD", type="primary", use_container_width=True):
     total = len(rows)
-    domain = extract_domain(rows[0]["URL"])
+    domain = rows[0]["_domain"]
 
     # Phase 1: Homepage
     org_data_text = "No organization data discovered."
+    homepage_data = None
     if not skip_org_discovery:
         with st.status("📡 Discovering organization data...", expanded=True):
-            homepage_data = fetch_page(domain + "/")
+            homepage_data = fetch_page(domain + "/", force_refresh=force_refresh)
             if homepage_data and homepage_data.get("status") != "error":
                 org_data_text = format_page_data_for_prompt(homepage_data)
                 st.write(f"✅ Homepage fetched. Business: {homepage_data.get('h1') or homepage_data.get('title', '?')}")
@@ -210,96 +251,223 @@ if st.button("🚀 Generate JSON-LD", type="primary", use_container_width=True):
     # Phase 2: Fetch pages
     page_data_cache = {}
     if fetch_pages:
-        with st.status(f"📄 Fetching {total} pages...", expanded=True):
+        urls = list(dict.fromkeys(r["URL"] for r in rows))
+        # A homepage row reuses the Phase 1 fetch instead of requesting the page again
+        if homepage_data and homepage_data.get("status") != "error" and domain + "/" in urls:
+            page_data_cache[domain + "/"] = homepage_data
+        urls = [url for url in urls if url not in page_data_cache]
+        with st.status(f"📄 Fetching {len(urls)} pages...", expanded=True):
             progress = st.progress(0)
-            for i, row in enumerate(rows):
-                url = row["URL"]
-                st.write(f"Fetching: {url}")
-                page_data_cache[url] = fetch_page(url)
-                progress.progress((i + 1) / total)
-                time.sleep(0.5)
-
-    # Phase 3: Hierarchy
-    hierarchy = build_service_hierarchy(rows)
-
-    def get_hierarchy_text(url):
-        info = hierarchy.get(url)
-        if not info:
-            return "No service hierarchy relationships."
-        parts = [f"This service is at depth {info['depth']}."]
-        if info["parent"]: parts.append(f"Parent service: {info['parent']}")
-        if info["children"]: parts.append(f"Child services: {', '.join(info['children'])}")
-        if info["siblings"]: parts.append(f"Sibling services: {', '.join(info['siblings'])}")
-        parts.append("\nWire isRelatedTo for parent↔child. Wire isSimilarTo for siblings.")
-        parts.append("Only reference URLs that exist in this batch.")
-        return "\n".join(parts)
+            for i, (url, page_data) in enumerate(fetch_all(urls, force_refresh=force_refresh)):
+                st.write(f"Fetched: {url}")
+                page_data_cache[url] = page_data
+                progress.progress((i + 1) / len(urls))
+
+    # Phase 3: Prompt inputs, built once up front so the generation loop only does lookups
+    hierarchy_texts = {r["URL"]: format_hierarchy_for_prompt(hierarchy.get(r["URL"])) for r in rows}
+    page_texts = {url: format_page_data_for_prompt(page_data_cache.get(url, {}))
+                  for url in dict.fromkeys(r["URL"] for r in rows)}
+    csv_overrides_texts = [get_csv_overrides(r) for r in rows]  # per row: duplicate URLs may differ
 
     # Phase 4: Generate
-    results = []
-    jsonld_blocks = []
+    results = [None] * total
     all_defined_ids = set()
+    usage_stats = {}
+
+    def make_id_snapshot():
+        """Return a function giving a frozen copy of all_defined_ids for the validator. Ids are
+        only ever added, so the last copy is reused until the set grows."""
+        snapshot = frozenset()
+
+        def current():
+            nonlocal snapshot
+            if len(snapshot) != len(all_defined_ids):
+                snapshot = frozenset(all_defined_ids)
+            return snapshot
+        return current
+
+    defined_ids_snapshot = make_id_snapshot()
+
+    def record_result(done, i, jsonld_str, error, validation):
+        row = rows[i]
+        url = row["URL"]
+        schema_type = row["_inferred_type"]
+        mode_label = "dual-type" if row["_is_dual"] else "single"
+        st.write(f"[{done+1}/{total}] {schema_type} ({mode_label}): {url}")
+
+        if error:
+            st.write(f"  ⚠️ Error: {error}")
+            results[i] = {
+                "url": url, "type": schema_type, "jsonld": jsonld_str, "error": error,
+                "validation": {"status": "FAIL", "issues": [(0, "FAIL", error)], "auto_fixes": [], "parsed": None},
+            }
+        else:
+            parsed = validation["parsed"]
+            if parsed:
+                all_defined_ids.update(
+                    e["@id"] for e in parsed.get("@graph", [parsed]) if isinstance(e, dict) and e.get("@id")
+                )
+
+            icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}.get(validation["status"], "?")
+            st.write(f"  {icon} Validation: {validation['status']}")
+            results[i] = {
+                "url": url, "type": schema_type, "jsonld": jsonld_str, "error": "",
+                "validation": validation,
+            }
+
+    async def generate_all():
+        client = AsyncAnthropic(api_key=api_key, max_retries=0)  # _stream_message owns retries
+        sem = asyncio.Semaphore(GENERATION_CONCURRENCY)
+        limiter = AsyncRateLimiter(GENERATION_RPM)
+
+        loop = asyncio.get_running_loop()
+        last_stream_update = 0.0
+
+        def show_stream(url, text):
+            nonlocal last_stream_update
+            now = time.monotonic()
+            if now - last_stream_update >= STREAM_UI_INTERVAL:
+                last_stream_update = now
+                stream_line.caption(f"✍️ {url}: {len(text):,} characters received")
+
+        async def generate(i, row):
+            url = row["URL"]
+            async with sem:
+                jsonld_str, error = await generate_jsonld_for_row_async(
+                    client=client, schema_type=row["_inferred_type"], url=url, domain=domain,
+                    page_data_text=page_texts[url],
+                    org_data_text=org_data_text, csv_overrides_text=csv_overrides_texts[i],
+                    hierarchy_text=hierarchy_texts[url], model=model, limiter=limiter,
+                    stats=usage_stats, on_text=lambda text: show_stream(url, text),
+                )
+            validation = None
+            if not error:
+                # Validate off the event loop against a snapshot of the ids known so far.
+                validation = await loop.run_in_executor(
+                    validation_pool, validate_jsonld, jsonld_str, defined_ids_snapshot(),
+                )
+            return i, jsonld_str, error, validation
+
+        tasks = [generate(i, row) for i, row in enumerate(rows)]
+        async with client:  # closes the connection pool before this event loop ends
+            for done, next_result in enumerate(asyncio.as_completed(tasks)):
+                i, jsonld_str, error, validation = await next_result
+                record_result(done, i, jsonld_str, error, validation)
+                progress.progress((done + 1) / total)
+
+    def generate_batch():
+        row_inputs = [{
+            "schema_type": row["_inferred_type"], "url": row["URL"], "domain": domain,
+            "page_data_text": page_texts[row["URL"]], "org_data_text": org_data_text,
+            "csv_overrides_text": csv_overrides_texts[i], "hierarchy_text": hierarchy_texts[row["URL"]],
+        } for i, row in enumerate(rows)]
+        outputs = generate_jsonld_batch(
+            api_key, row_inputs, model=model, stats=usage_stats,
+            on_progress=lambda done, submitted: progress.progress(
+                done / submitted, text=f"Batch: {done}/{submitted} requests processed"),
+        )
+        for i, (jsonld_str, error) in enumerate(outputs):
+            validation = None if error else validate_jsonld(jsonld_str, defined_ids_snapshot())
+            record_result(i, i, jsonld_str, error, validation)
+        progress.progress(1.0)
 
     with st.status(f"🤖 Generating JSON-LD for {total} URLs...", expanded=True):
         progress = st.progress(0)
-        for i, row in enumerate(rows):
-            url = row["URL"]
-            schema_type = row["_inferred_type"]
-            mode_label = "dual-type" if row["_is_dual"] else "single"
-            st.write(f"[{i+1}/{total}] {schema_type} ({mode_label}): {url}")
-
-            page_text = format_page_data_for_prompt(page_data_cache.get(url, {}))
-            csv_overrides = get_csv_overrides(row)
-            hierarchy_text = get_hierarchy_text(url)
-
-            jsonld_str, error = generate_jsonld_for_row(
-                api_key=api_key, schema_type=schema_type, url=url, domain=domain,
-                page_data_text=page_text, org_data_text=org_data_text,
-                csv_overrides_text=csv_overrides, hierarchy_text=hierarchy_text,
-                model=model,
+        if use_batch_api:
+            generate_batch()
+        else:
+            stream_line = st.empty()
+            with ProcessPoolExecutor(max_workers=VALIDATION_WORKERS) as validation_pool:
+                asyncio.run(generate_all())
+            stream_line.empty()
+        st.write(
+            f"♻️ Response cache: {usage_stats.get('jsonld_cache_hits', 0)} hits, "
+            f"{usage_stats.get('jsonld_cache_misses', 0)} misses"
+        )
+        if "input_tokens" in usage_stats:
+            st.write(
+                f"🗄️ Prompt cache: {usage_stats['cache_read_input_tokens']:,} tokens read from cache, "
+                f"{usage_stats['cache_creation_input_tokens']:,} written, "
+                f"{usage_stats['input_tokens']:,} uncached input tokens"
             )
 
-            if error:
-                st.write(f"  ⚠️ Error: {error}")
-                results.append({
-                    "url": url, "type": schema_type, "jsonld": jsonld_str, "error": error,
-                    "validation": {"status": "FAIL", "issues": [(0, "FAIL", error)], "auto_fixes": [], "parsed": None},
-                })
-            else:
-                validation = validate_jsonld(jsonld_str, all_defined_ids)
-                if validation["parsed"]:
-                    parsed = validation["parsed"]
-                    if "@graph" in parsed:
-                        for entity in parsed["@graph"]:
-                            if entity.get("@id"):
-                                all_defined_ids.add(entity["@id"])
-                    elif parsed.get("@id"):
-                        all_defined_ids.add(parsed["@id"])
-
-                icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}.get(validation["status"], "?")
-                st.write(f"  {icon} Validation: {validation['status']}")
-                results.append({
-                    "url": url, "type": schema_type, "jsonld": jsonld_str, "error": "",
-                    "validation": validation,
-                })
-                if validation["parsed"]:
-                    jsonld_blocks.append(validation["parsed"])
-
-            progress.progress((i + 1) / total)
-            time.sleep(0.3)
+    wired_results = [r for r in results if r["validation"]["parsed"]]
+    jsonld_blocks = [r["validation"]["parsed"] for r in wired_results]
 
     # Phase 5: Graph wiring
-    if run_graph_wiring and jsonld_blocks:
+    if jsonld_blocks:
         with st.status("🔗 Running graph wiring pass...", expanded=True):
-            corrected_blocks, wiring_report = graph_wiring_pass(
-                api_key=api_key, all_jsonld_blocks=jsonld_blocks, model=model,
-            )
-            st.write(wiring_report)
-            block_idx = 0
-            for result in results:
-                if result["validation"]["parsed"] and block_idx < len(corrected_blocks):
-                    result["jsonld"] = json.dumps(corrected_blocks[block_idx], indent=2)
-                    result["validation"]["parsed"] = corrected_blocks[block_idx]
-                    block_idx += 1
+            fixed = wire_graph_locally(jsonld_blocks)
+            for j in fixed:
+                # Fixed in place: re-validate so status and issues describe the exported block,
+                # whose text is then re-serialized from the dict (see jsonld_text)
+                validation = validate_jsonld(orjson.dumps(jsonld_blocks[j]).decode(), frozenset(all_defined_ids))
+                jsonld_blocks[j] = validation["parsed"]
+                wired_results[j]["validation"] = validation
+                wired_results[j]["jsonld"] = None
+            if fixed:
+                st.write(f"🛠️ Local wiring fixed {len(fixed)} block(s).")
+            violations = find_wiring_violations(jsonld_blocks)
+            if not violations:
+                st.write("✅ Local graph check passed; no LLM wiring needed.")
+            elif not run_graph_wiring:
+                st.write(f"⚠️ {len(violations)} graph issue(s) left; enable the LLM wiring fallback to resolve them.")
+            else:
+                # Only blocks with a detected problem go to the model, grouped as before
+                issues_by_block = {}
+                for j, message in violations:
+                    issues_by_block.setdefault(j, []).append(message)
+                flagged = sorted(issues_by_block)
+                chunks = [
+                    [flagged[k] for k in chunk]
+                    for chunk in group_wiring_chunks([wired_results[j]["url"] for j in flagged], hierarchy)
+                ]
+                partial = len(chunks) > 1 or len(flagged) < len(jsonld_blocks)
+                wiring_known_ids = all_defined_ids if partial else ()
+                wiring_stats = {}
+                st.write(f"🔍 Local graph check found {len(violations)} issue(s) in {len(flagged)} block(s).")
+
+                async def wire_all():
+                    client = AsyncAnthropic(api_key=api_key, max_retries=0)  # _stream_message owns retries
+                    sem = asyncio.Semaphore(GENERATION_CONCURRENCY)
+                    limiter = AsyncRateLimiter(GENERATION_RPM)
+
+                    async def wire(chunk):
+                        async with sem:
+                            return await graph_wiring_pass_async(
+                                client, [jsonld_blocks[j] for j in chunk], model=wiring_model,
+                                known_ids=wiring_known_ids,
+                                violations=[message for j in chunk for message in issues_by_block[j]],
+                                limiter=limiter, stats=wiring_stats,
+                            )
+
+                    async with client:
+                        return await asyncio.gather(*(wire(chunk) for chunk in chunks))
+
+                wiring_outcomes = asyncio.run(wire_all())
+                changed = 0
+                for chunk, (corrected_blocks, error) in zip(chunks, wiring_outcomes):
+                    if error:
+                        st.write(f"⚠️ {error}")
+                        continue
+                    for j, block in zip(chunk, corrected_blocks):
+                        if block == jsonld_blocks[j]:
+                            continue  # unchanged: keep the original text as-is
+                        validation = validate_jsonld(orjson.dumps(block).decode(), frozenset(all_defined_ids)) \
+                            if isinstance(block, dict) else None
+                        if validation is None or not isinstance(validation["parsed"], dict):
+                            # Never trade a generated block for a non-object; keep the original
+                            st.write(f"⚠️ Graph wiring returned an unusable block for "
+                                     f"{wired_results[j]['url']}. Keeping the original.")
+                            continue
+                        # Keep the corrected dict, re-validated; its text is serialized on demand
+                        wired_results[j]["jsonld"] = None
+                        wired_results[j]["validation"] = validation
+                        changed += 1
+                st.write(
+                    f"Graph wiring completed over {len(flagged)} blocks in {len(chunks)} chunk(s), "
+                    f"{changed} changed ({wiring_stats.get('jsonld_cache_hits', 0)} served from cache)."
+                )
 
     st.session_state["results"] = results
     st.session_state["rows"] = rows
@@ -307,6 +475,46 @@ if st.button("🚀 Generate JSON-LD", type="primary", use_container_width=True):
 
 # ─── Results ─────────────────────────────────────────────────────────────────
 
+def jsonld_text(result):
+    """JSON-LD text for a result. Wired blocks carry jsonld=None and are serialized from their dict."""
+    if result["jsonld"] is None:
+        return orjson.dumps(result["validation"]["parsed"], option=orjson.OPT_INDENT_2).decode()
+    return result["jsonld"]
+
+
+@st.fragment
+def render_result(i, result, row):
+    """Render one result expander. As a fragment, its widgets rerun only this expander."""
+    icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}.get(result["validation"]["status"], "?")
+    dual_tag = " [DUAL]" if row.get("_is_dual") else ""
+    label = f"{icon} [{result['type']}]{dual_tag} {result['url']}"
+
+    with st.expander(label, expanded=False):
+        if result["validation"]["issues"]:
+            st.markdown("**Validation Issues:**")
+            for rule_num, severity, msg in result["validation"]["issues"]:
+                sev_icon = {"FAIL": "❌", "WARN": "⚠️"}.get(severity, "ℹ️")
+                st.markdown(f"- {sev_icon} Rule {rule_num}: {msg}")
+
+        if result["validation"]["auto_fixes"]:
+            st.markdown("**Auto-Fixes:**")
+            for fix in result["validation"]["auto_fixes"]:
+                st.markdown(f"- 🔧 {fix}")
+
+        if result["error"]:
+            st.error(f"Error: {result['error']}")
+
+        if result["jsonld"] != "":
+            st.markdown("**JSON-LD Output:**")
+            if result["jsonld"] is None:
+                st.json(result["validation"]["parsed"])
+            else:
+                st.code(result["jsonld"], language="json")
+            if st.toggle("Show with `<script>` wrapper", key=f"show_wrapped_{i}"):
+                wrapped = f'<script type="application/ld+json">\n{jsonld_text(result)}\n</script>'
+                st.code(wrapped, language="html")
+
+
 if "results" in st.session_state:
     results = st.session_state["results"]
     rows = st.session_state["rows"]
@@ -334,31 +542,7 @@ if "results" in st.session_state:
     st.markdown("")
 
     for i, (result, row) in enumerate(zip(results, rows)):
-        icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}.get(result["validation"]["status"], "?")
-        dual_tag = " [DUAL]" if row.get("_is_dual") else ""
-        label = f"{icon} [{result['type']}]{dual_tag} {result['url']}"
-
-        with st.expander(label, expanded=False):
-            if result["validation"]["issues"]:
-                st.markdown("**Validation Issues:**")
-                for rule_num, severity, msg in result["validation"]["issues"]:
-                    sev_icon = {"FAIL": "❌", "WARN": "⚠️"}.get(severity, "ℹ️")
-                    st.markdown(f"- {sev_icon} Rule {rule_num}: {msg}")
-
-            if result["validation"]["auto_fixes"]:
-                st.markdown("**Auto-Fixes:**")
-                for fix in result["validation"]["auto_fixes"]:
-                    st.markdown(f"- 🔧 {fix}")
-
-            if result["error"]:
-                st.error(f"Error: {result['error']}")
-
-            if result["jsonld"]:
-                st.markdown("**JSON-LD Output:**")
-                st.code(result["jsonld"], language="json")
-                wrapped = f'<script type="application/ld+json">\n{result["jsonld"]}\n</script>'
-                st.markdown("**With `<script>` wrapper:**")
-                st.code(wrapped, language="html")
+        render_result(i, result, row)
 
     # ─── Downloads ───────────────────────────────────────────────────────
 
@@ -367,34 +551,52 @@ if "results" in st.session_state:
 
     c1, c2, c3 = st.columns(3)
 
+    def build_csv():
+        # Written in CSV_BATCH_ROWS slices so only one slice of JSON-LD text is materialized at a time
+        csv_buffer = io.BytesIO()
+        with pacsv.CSVWriter(csv_buffer, CSV_SCHEMA) as writer:
+            for start in range(0, len(results), CSV_BATCH_ROWS):
+                batch = list(zip(results[start:start + CSV_BATCH_ROWS], rows[start:start + CSV_BATCH_ROWS]))
+                writer.write_batch(pa.record_batch([
+                    [result["url"] for result, _ in batch],
+                    [result["type"] for result, _ in batch],
+                    ["Dual" if row.get("_is_dual") else "Single" for _, row in batch],
+                    [result["validation"]["status"] for result, _ in batch],
+                    ["; ".join(f"Rule {n}: {m}" for n, s, m in result["validation"]["issues"]) or "—"
+                     for result, _ in batch],
+                    [jsonld_text(result) for result, _ in batch],
+                ], schema=CSV_SCHEMA))
+        return csv_buffer.getvalue()
+
     with c1:
-        csv_rows = []
-        for result, row in zip(results, rows):
-            csv_rows.append({
-                "URL": result["url"],
-                "SchemaType": result["type"],
-                "Mode": "Dual" if row.get("_is_dual") else "Single",
-                "Validation": result["validation"]["status"],
-                "Issues": "; ".join(f"Rule {n}: {m}" for n, s, m in result["validation"]["issues"]) or "—",
-                "JSON-LD": result["jsonld"],
-            })
-        csv_df = pd.DataFrame(csv_rows)
-        csv_buffer = io.StringIO()
-        csv_df.to_csv(csv_buffer, index=False)
-        st.download_button("📥 Download CSV", data=csv_buffer.getvalue(),
+        # Built on click rather than on every rerun
+        st.download_button("📥 Download CSV", data=build_csv,
             file_name="structured_data_output.csv", mime="text/csv", use_container_width=True)
 
-    with c2:
+    def build_zip():
         zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            for result, row in zip(results, rows):
-                if result["jsonld"]:
-                    path = urlparse(result["url"]).path.strip("/")
-                    slug = path.replace("/", "-") if path else "homepage"
-                    type_prefix = result["type"].lower().replace("|", "-")
-                    filename = f"{type_prefix}-{slug}.json"
+        used_filenames = set()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for result in results:
+                if result["jsonld"] == "":
+                    continue
+                path = urlparse(result["url"]).path.strip("/")
+                slug = path.replace("/", "-") if path else "homepage"
+                type_prefix = result["type"].lower().replace("|", "-")
+                # Suffix colliding slugs (e.g. /a and /a?x=1) instead of silently overwriting
+                filename, n = f"{type_prefix}-{slug}.json", 1
+                while filename in used_filenames:
+                    n += 1
+                    filename = f"{type_prefix}-{slug}-{n}.json"
+                used_filenames.add(filename)
+                if result["jsonld"] is None:
+                    zf.writestr(filename, orjson.dumps(result["validation"]["parsed"], option=orjson.OPT_INDENT_2))
+                else:
                     zf.writestr(filename, result["jsonld"])
-        st.download_button("📦 Download JSON (ZIP)", data=zip_buffer.getvalue(),
+        return zip_buffer.getvalue()
+
+    with c2:
+        st.download_button("📦 Download JSON (ZIP)", data=build_zip,
             file_name="structured_data_json_files.zip", mime="application/zip", use_container_width=True)
 
     with c3:
@@ -3,12 +3,41 @@ Claude API integration for JSON-LD structured data generation.
 Updated with dual-type support and expanded model list.
 """
 
-import json
+import re
+import orjson
+import time
+import asyncio
+import hashlib
+import functools
+from datetime import datetime, timezone
 import anthropic
+from diskcache import Cache
 from knowledge import (
     TEMPLATES, WIKIDATA_COUNTRIES, WIKIDATA_CITIES, WIKIDATA_SERVICE_CONCEPTS,
+    DEPRECATED_PROPERTIES, DEPRECATED_PROPERTY_RENAMES, INVALID_PROPERTIES, EXTERNAL_ID_PREFIXES,
 )
 
+JSONLD_CACHE_DIR = ".cache/jsonld"
+RATE_LIMIT_RETRIES = 3
+# Worth retrying after a pause; limiter-driven clients are built with max_retries=0 so
+# these retries stay inside the shared rate limiter instead of the SDK's own backoff
+TRANSIENT_API_ERRORS = (
+    anthropic.APIConnectionError, anthropic.InternalServerError,
+    anthropic.OverloadedError, anthropic.ServiceUnavailableError,
+)
+BATCH_POLL_INTERVAL = 30  # seconds
+BATCH_MAX_WAIT = 24 * 60 * 60  # seconds; the API expires batches still unfinished after 24 hours
+BATCH_MAX_REQUESTS = 100_000  # Message Batches API limits per batch
+BATCH_MAX_BYTES = 200 * 1024 * 1024  # headroom under the 256 MB request size cap
+EARLY_ABORT_CHARS = 256  # streamed responses with no JSON by this point are abandoned
+WIRING_MODEL = "claude-haiku-4-5-20251001"  # wiring is mechanical; the small model is enough
+WIRING_MAX_TOKENS = 16000
+TOKEN_LOW_WATER = 0.2  # hold new requests until the token reset once remaining drops below this share
+
+_JSONLD_CACHE = None
+_LOCAL_SLOT_RE = re.compile(r"\{\{(url|domain)\}\}")  # template slots filled before the request
+_FENCE_RE = re.compile(r"\A```[\w-]*[ \t]*\n?|\n?```\Z")
+
 SYSTEM_PROMPT = """You are an expert Technical SEO and Semantic Web Engineer specializing in JSON-LD structured data generation.
 
 Your job is to generate a single, valid JSON-LD block for a given URL based on the provided context.
@@ -75,6 +104,84 @@ First occurrence needs @type + name + @id. Subsequent can use bare @id.
 Return ONLY raw JSON. No markdown code fences. No explanation. Just valid JSON."""
 
 
+@functools.lru_cache(maxsize=8)
+def _build_system_blocks(org_data_text, cache_ttl=None):
+    """System prompt as content blocks. The static rules and Wikidata reference come first
+    and the batch-wide organization data last, all marked for prompt caching so every row
+    after the first reads the shared prefix from cache. Memoized: org data is fixed per run.
+
+    cache_ttl="1h" keeps the prefix cached past the default 5 minutes, which Batch API
+    jobs need since their requests can be processed well apart from each other."""
+    cache_control = {"type": "ephemeral", "ttl": cache_ttl} if cache_ttl else {"type": "ephemeral"}
+    return [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": cache_control},
+        {"type": "text", "text": build_wikidata_reference(), "cache_control": cache_control},
+        {"type": "text", "text": f"## Organization Data\n{org_data_text}", "cache_control": cache_control},
+    ]
+
+
+@functools.lru_cache(maxsize=4)
+def _client(api_key):
+    """One Anthropic client per API key, so its HTTP connection pool is reused across calls."""
+    return anthropic.Anthropic(api_key=api_key, max_retries=3)
+
+
+def _bump(stats, key, amount=1):
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + amount
+
+
+def _record_usage(message, stats):
+    """Accumulate token usage (including prompt-cache reads/writes) into a stats dict."""
+    for key in ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+        _bump(stats, key, getattr(message.usage, key, 0) or 0)
+
+
+def _jsonld_cache():
+    """Open the on-disk JSON-LD response cache (created on first use)."""
+    global _JSONLD_CACHE
+    if _JSONLD_CACHE is None:
+        _JSONLD_CACHE = Cache(JSONLD_CACHE_DIR)
+    return _JSONLD_CACHE
+
+
+@functools.lru_cache(maxsize=1)
+def _prompt_fingerprint():
+    """Hash of the static prompt text (rules, Wikidata reference, templates, instructions)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (SYSTEM_PROMPT, build_wikidata_reference(), _ROW_INSTRUCTIONS):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(orjson.dumps(TEMPLATES))
+    return digest.hexdigest()
+
+
+def _jsonld_cache_key(model, schema_type, *prompt_inputs):
+    """Content-addressed key over every prompt input. Keys are bucketed by schema type;
+    the model and the static prompt fingerprint are hashed in, so switching models or
+    editing the rules/templates never serves stale output."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (_prompt_fingerprint(), model, schema_type, *prompt_inputs):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"jsonld:v2:{schema_type}:{digest.hexdigest()}"
+
+
+def _cache_lookup(cache_key, stats):
+    cached = _jsonld_cache().get(cache_key)
+    _bump(stats, "jsonld_cache_hits" if cached else "jsonld_cache_misses")
+    return cached["jsonld"] if cached else None
+
+
+def _cache_store(cache_key, schema_type, model, result):
+    raw_text, error = result
+    if not error:
+        _jsonld_cache().set(cache_key, {"jsonld": raw_text, "model": model, "ts": time.time()},
+                            tag=schema_type)
+    return result
+
+
+@functools.lru_cache(maxsize=1)
 def build_wikidata_reference():
     lines = ["## Known Wikidata URIs\n"]
     lines.append("### Countries")
@@ -89,17 +196,102 @@ def build_wikidata_reference():
     return "\n".join(lines)
 
 
-def generate_jsonld_for_row(
-    api_key, schema_type, url, domain, page_data_text, org_data_text,
-    csv_overrides_text, hierarchy_text, model="claude-sonnet-4-20250514",
-):
-    template = TEMPLATES.get(schema_type, "")
-
-    is_dual = "|" in schema_type
-    dual_instruction = ""
-    if is_dual:
-        container, nested = schema_type.split("|", 1)
-        dual_instruction = f"""
+SKELETON_LINKS = {
+    "LocalBusiness": ("parentOrganization",),
+    "Service": ("provider", "brand"),
+    "WebContent": ("about", "creator"),
+    "AboutPage": ("mainEntity", "about"),
+    "Person": ("worksFor",),
+}
+
+
+def build_skeleton(schema_type, url, domain):
+    """Deterministic @context/@type/@id frame and Organization wiring for a row.
+
+    The model is asked to keep these values as given and only fill in the descriptive
+    properties; _apply_skeleton restores any structural field it still leaves out.
+    """
+    org_ref = {"@id": f"{domain}/#Organization"}
+
+    def frame(etype):
+        eid = org_ref["@id"] if etype == "Organization" else f"{url}#{etype}"
+        entity = {"@type": etype, "@id": eid, "url": url}
+        entity.update((prop, org_ref) for prop in SKELETON_LINKS.get(etype, ()))
+        return entity
+
+    if "|" not in schema_type:
+        return {"@context": "https://schema.org", **frame(schema_type)}
+
+    container_type, nested_type = schema_type.split("|", 1)
+    container = {"@type": container_type, "@id": f"{url}#{container_type}", "url": url}
+    nested = frame(nested_type)
+    container["mainEntity"] = {"@id": nested["@id"]}
+    nested["subjectOf"] = {"@id": container["@id"]}
+    return {"@context": "https://schema.org", "@graph": [container, nested]}
+
+
+def _apply_skeleton(raw_text, parsed, skeleton):
+    """Fill structural fields the model omitted from the skeleton, given the response text and
+    its already-parsed form. Returns raw_text if none were missing."""
+    if not isinstance(parsed, dict):
+        return raw_text
+    changed = "@context" not in parsed
+    parsed.setdefault("@context", skeleton["@context"])
+    entities = parsed["@graph"] if isinstance(parsed.get("@graph"), list) else [parsed]
+    # @type may be a list (["WebPage", "AboutPage"]); index the entity under each of its types
+    by_type = {}
+    for e in entities:
+        if isinstance(e, dict):
+            types = e.get("@type")
+            for etype in types if isinstance(types, list) else [types]:
+                if isinstance(etype, str):
+                    by_type[etype] = e
+    for frame in skeleton.get("@graph", [skeleton]):
+        entity = by_type.get(frame["@type"])
+        if entity is None:
+            continue
+        for key, value in frame.items():
+            if key != "@context" and key not in entity:
+                entity[key] = value
+                changed = True
+    return orjson.dumps(parsed, option=orjson.OPT_INDENT_2).decode() if changed else raw_text
+
+
+def _compile_template(template):
+    """Split a template's JSON text around its locally filled slots.
+
+    Returns (literals, slots) with len(literals) == len(slots) + 1, so rendering is a join.
+    """
+    parts = _LOCAL_SLOT_RE.split(orjson.dumps(template, option=orjson.OPT_INDENT_2).decode())
+    return parts[0::2], parts[1::2]
+
+
+_COMPILED_TEMPLATES = {schema_type: _compile_template(t) for schema_type, t in TEMPLATES.items()}
+
+
+def _render_template(schema_type, url, domain):
+    """Template JSON for a row with the slots known locally ({{url}}, {{domain}}) filled in,
+    so the model neither reads nor re-emits them as placeholders."""
+    compiled = _COMPILED_TEMPLATES.get(schema_type)
+    if compiled is None:
+        return ""
+    literals, slots = compiled
+    # JSON-escape the values the same way the template strings themselves were escaped
+    values = {"url": orjson.dumps(url).decode()[1:-1], "domain": orjson.dumps(domain).decode()[1:-1]}
+    parts = [literals[0]]
+    for slot, literal in zip(slots, literals[1:]):
+        parts.append(values[slot])
+        parts.append(literal)
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _dual_instruction(schema_type):
+    """Prompt section for dual-type rows; depends only on the type, so it is built once per type."""
+    if "|" not in schema_type:
+        return ""
+    container, nested = schema_type.split("|", 1)
+    return f"""
 ## DUAL-TYPE MODE: {container}|{nested}
 This is a DUAL-TYPE row. Generate @graph with:
 1. A {container} entity (container) with mainEntity pointing to the {nested}
@@ -108,7 +300,24 @@ This is a DUAL-TYPE row. Generate @graph with:
 - Put domain-specific properties (provider, brand, areaServed, hierarchy) on the {nested} ONLY
 """
 
-    user_prompt = f"""Generate JSON-LD structured data for this URL.
+
+_ROW_INSTRUCTIONS = """## Instructions
+1. Start from the skeleton and fill the remaining template {{placeholders}} using: CSV overrides > page data > org data > omit
+2. Remove any property where no data is available
+3. Remove empty arrays []
+4. For areaServed, include @type + name + @id on first occurrence
+5. Wire @id references correctly
+6. Ensure telephone is E.164 format, dates are ISO 8601
+7. Return ONLY raw JSON"""
+
+
+def _build_user_prompt(
+    schema_type, url, domain, page_data_text, csv_overrides_text, hierarchy_text,
+):
+    template = _render_template(schema_type, url, domain)
+    skeleton = orjson.dumps(build_skeleton(schema_type, url, domain), option=orjson.OPT_INDENT_2).decode()
+
+    return f"""Generate JSON-LD structured data for this URL.
 
 ## Target URL
 {url}
@@ -118,12 +327,12 @@ This is a DUAL-TYPE row. Generate @graph with:
 
 ## Domain
 {domain}
-{dual_instruction}
+{_dual_instruction(schema_type)}
 ## Template
 {template}
 
-## Organization Data
-{org_data_text}
+## Skeleton (pre-filled — keep every value exactly as given)
+{skeleton}
 
 ## Page Data
 {page_data_text}
@@ -134,48 +343,484 @@ This is a DUAL-TYPE row. Generate @graph with:
 ## Service Hierarchy
 {hierarchy_text}
 
-{build_wikidata_reference()}
+{_ROW_INSTRUCTIONS}"""
 
-## Instructions
-1. Fill the template using: CSV overrides > page data > org data > omit
-2. Remove any property where no data is available
-3. Remove empty arrays []
-4. For areaServed, include @type + name + @id on first occurrence
-5. Wire @id references correctly
-6. Ensure telephone is E.164 format, dates are ISO 8601
-7. Return ONLY raw JSON"""
 
-    client = anthropic.Anthropic(api_key=api_key)
+def _row_request_params(
+    model, schema_type, url, domain, page_data_text, org_data_text, csv_overrides_text, hierarchy_text,
+    cache_ttl=None,
+):
+    """messages.create keyword arguments for one row, shared by the sync, async and batch paths."""
+    user_prompt = _build_user_prompt(
+        schema_type, url, domain, page_data_text, csv_overrides_text, hierarchy_text,
+    )
+    return {
+        "model": model, "max_tokens": 4096, "system": _build_system_blocks(org_data_text, cache_ttl),
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+
+
+def _row_cache_key(model, schema_type, params, org_data_text):
+    """Cache key for a row request, hashed over the user prompt as sent so every input it
+    renders (url, domain, page data, overrides, hierarchy) is covered."""
+    return _jsonld_cache_key(model, schema_type, params["messages"][0]["content"], org_data_text)
+
+
+def _strip_fences(text):
+    """Remove a surrounding markdown code fence (``` or ```json) from a model response."""
+    return _FENCE_RE.sub("", text.strip()).strip()
+
+
+def _parse_jsonld_response(message, skeleton=None):
+    """Strip code fences from a row response, check it parses and apply the skeleton.
+
+    Returns (raw_text, error).
+    """
+    raw_text = _strip_fences(message.content[0].text)
     try:
-        message = client.messages.create(
-            model=model, max_tokens=4096, system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
-        )
-        raw_text = message.content[0].text.strip()
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("\n", 1)[-1]
-        if raw_text.endswith("```"):
-            raw_text = raw_text.rsplit("```", 1)[0]
-        raw_text = raw_text.strip()
-        try:
-            json.loads(raw_text)
-        except json.JSONDecodeError as e:
-            return raw_text, f"JSON parse error: {e}"
-        return raw_text, ""
+        parsed = orjson.loads(raw_text)
+    except orjson.JSONDecodeError as e:
+        return raw_text, f"JSON parse error: {e}"
+    if skeleton is not None:
+        raw_text = _apply_skeleton(raw_text, parsed, skeleton)
+    return raw_text, ""
+
+
+def generate_jsonld_for_row(
+    api_key, schema_type, url, domain, page_data_text, org_data_text,
+    csv_overrides_text, hierarchy_text, model="claude-sonnet-4-20250514", stats=None, on_text=None,
+):
+    """Generate one row's JSON-LD, streaming the response; on_text(text_so_far) sees it arrive."""
+    params = _row_request_params(
+        model, schema_type, url, domain, page_data_text, org_data_text, csv_overrides_text, hierarchy_text,
+    )
+    cache_key = _row_cache_key(model, schema_type, params, org_data_text)
+    cached = _cache_lookup(cache_key, stats)
+    if cached is not None:
+        return cached, ""
+
+    client = _client(api_key)
+    try:
+        with client.messages.stream(**params) as stream:
+            text = ""
+            for delta in stream.text_stream:
+                text += delta
+                _guard_json_start(text, delta)
+                if on_text:
+                    on_text(text)
+            message = stream.get_final_message()
+        _record_usage(message, stats)
+        return _cache_store(cache_key, schema_type, model, _parse_jsonld_response(
+            message, build_skeleton(schema_type, url, domain)))
     except anthropic.APIError as e:
         return "", f"API error: {e}"
     except Exception as e:
         return "", f"Unexpected error: {e}"
 
 
-def graph_wiring_pass(api_key, all_jsonld_blocks, model="claude-sonnet-4-20250514"):
-    blocks_json = json.dumps(all_jsonld_blocks, indent=2)
+class AsyncRateLimiter:
+    """Token bucket allowing `rate` acquisitions per `period` seconds."""
+
+    def __init__(self, rate, period=60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+                refill = (now - self._updated) * self.rate / self.period
+                self._tokens = min(self.rate, self._tokens + refill)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+    def update(self, headers):
+        """Adapt to the server's quota from anthropic-ratelimit-* response headers.
+
+        The request limit and remaining count reshape the bucket; when the remaining input
+        token budget falls under TOKEN_LOW_WATER of its limit, new acquisitions wait for
+        the token reset instead of running into a 429.
+        """
+        limit = headers.get("anthropic-ratelimit-requests-limit")
+        if limit:
+            self.rate = float(limit)
+        remaining = headers.get("anthropic-ratelimit-requests-remaining")
+        if remaining is not None:
+            self._tokens = min(self._tokens, float(remaining))
+
+        tokens_limit = headers.get("anthropic-ratelimit-tokens-limit")
+        tokens_remaining = headers.get("anthropic-ratelimit-tokens-remaining")
+        tokens_reset = headers.get("anthropic-ratelimit-tokens-reset")
+        if not (tokens_limit and tokens_remaining and tokens_reset):
+            return
+        try:
+            if float(tokens_remaining) >= TOKEN_LOW_WATER * float(tokens_limit):
+                return
+            wait = (datetime.fromisoformat(tokens_reset) - datetime.now(timezone.utc)).total_seconds()
+        except ValueError:
+            return
+        if wait > 0:
+            self._resume_at = max(self._resume_at, time.monotonic() + wait)
+
+    def pause(self, seconds):
+        """Hold every pending acquisition for roughly `seconds` (e.g. a 429 retry-after)."""
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate / self.period
+
+
+def _guard_json_start(text, delta):
+    """Abort a streamed response that gets EARLY_ABORT_CHARS in without any JSON opener."""
+    if (len(text) - len(delta) < EARLY_ABORT_CHARS <= len(text)
+            and "{" not in text and "[" not in text):
+        raise ValueError(f"no JSON in the first {EARLY_ABORT_CHARS} characters of the response; aborted")
+
+
+async def _stream_message(client, limiter, on_text=None, **kwargs):
+    """Stream one message through the limiter and return the final Message.
+
+    on_text(text_so_far) is called as text arrives. Rate-limit headers on each response,
+    and retry-after on a 429, are fed back so all concurrent requests back off together.
+    Transient server and connection errors are retried here too, so the client should be
+    created with max_retries=0.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if limiter:
+            await limiter.acquire()
+        try:
+            async with client.messages.stream(**kwargs) as stream:
+                if limiter:
+                    limiter.update(stream.response.headers)
+                text = ""
+                async for delta in stream.text_stream:
+                    text += delta
+                    _guard_json_start(text, delta)
+                    if on_text:
+                        on_text(text)
+                return await stream.get_final_message()
+        except anthropic.RateLimitError as e:
+            if limiter is None or attempt == RATE_LIMIT_RETRIES:
+                raise
+            # Honor retry-after when present; otherwise back off exponentially (1s, 2s, 4s, ...)
+            try:
+                retry_after = float(e.response.headers["retry-after"])
+            except (KeyError, ValueError):
+                retry_after = 2.0 ** attempt
+            limiter.pause(retry_after)
+        except TRANSIENT_API_ERRORS:
+            if limiter is None or attempt == RATE_LIMIT_RETRIES:
+                raise
+            # Server-side or network trouble with this request only; back off without
+            # holding everyone else's slots
+            await asyncio.sleep(2.0 ** attempt)
+
+
+async def generate_jsonld_for_row_async(
+    client, schema_type, url, domain, page_data_text, org_data_text,
+    csv_overrides_text, hierarchy_text, model="claude-sonnet-4-20250514",
+    limiter=None, stats=None, on_text=None,
+):
+    """Async variant of generate_jsonld_for_row using a shared AsyncAnthropic client."""
+    params = _row_request_params(
+        model, schema_type, url, domain, page_data_text, org_data_text, csv_overrides_text, hierarchy_text,
+    )
+    cache_key = _row_cache_key(model, schema_type, params, org_data_text)
+    cached = _cache_lookup(cache_key, stats)
+    if cached is not None:
+        return cached, ""
 
-    user_prompt = f"""Review these JSON-LD blocks for graph integrity and fix any issues.
+    try:
+        message = await _stream_message(client, limiter, on_text=on_text, **params)
+        _record_usage(message, stats)
+        return _cache_store(cache_key, schema_type, model, _parse_jsonld_response(
+            message, build_skeleton(schema_type, url, domain)))
+    except anthropic.APIError as e:
+        return "", f"API error: {e}"
+    except Exception as e:
+        return "", f"Unexpected error: {e}"
+
+
+def _split_batch_requests(requests):
+    """Split batch requests into submissions under BATCH_MAX_REQUESTS and BATCH_MAX_BYTES."""
+    chunks, current, size = [], [], 0
+    for request in requests:
+        request_size = len(orjson.dumps(request))
+        if current and (len(current) >= BATCH_MAX_REQUESTS or size + request_size > BATCH_MAX_BYTES):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(request)
+        size += request_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def generate_jsonld_batch(
+    api_key, row_inputs, model="claude-sonnet-4-20250514",
+    poll_interval=BATCH_POLL_INTERVAL, max_wait=BATCH_MAX_WAIT, on_progress=None, stats=None,
+):
+    """Generate JSON-LD for many rows through the Message Batches API (half price, slower).
+
+    row_inputs holds one dict of generate_jsonld_for_row keyword arguments per row. Cached
+    rows are answered locally; the rest go out in as few batches as the API size limits
+    allow, polled until all have ended or max_wait seconds pass. on_progress(done, submitted)
+    is called on every poll. Batches left unfinished by an error, the timeout or an
+    interruption are cancelled and their rows reported as errors. Returns a list of
+    (jsonld, error) tuples in input order.
+    """
+    outputs = [None] * len(row_inputs)
+    cache_keys = {}
+    requests = []
+    for i, inputs in enumerate(row_inputs):
+        params = _row_request_params(model, cache_ttl="1h", **inputs)
+        cache_key = _row_cache_key(model, inputs["schema_type"], params, inputs["org_data_text"])
+        cached = _cache_lookup(cache_key, stats)
+        if cached is not None:
+            outputs[i] = (cached, "")
+            continue
+        cache_keys[i] = cache_key
+        requests.append({"custom_id": f"row-{i}", "params": params})
+
+    if requests:
+        client = _client(api_key)
+        batches = []
+        try:
+            # Created one at a time so a rejected submission still cancels those already accepted
+            for chunk in _split_batch_requests(requests):
+                batches.append(client.messages.batches.create(requests=chunk))
+            deadline = time.monotonic() + max_wait
+            while True:
+                processing = sum(b.request_counts.processing for b in batches)
+                if on_progress:
+                    on_progress(len(requests) - processing, len(requests))
+                if all(b.processing_status == "ended" for b in batches):
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timeout_error = ("", f"Batch did not finish within {max_wait}s and was cancelled")
+                    return [out or timeout_error for out in outputs]
+                time.sleep(min(poll_interval, remaining))
+                batches = [b if b.processing_status == "ended" else client.messages.batches.retrieve(b.id)
+                           for b in batches]
+
+            entries = (entry for b in batches for entry in client.messages.batches.results(b.id))
+            for entry in entries:
+                i = int(entry.custom_id.split("-", 1)[1])
+                if entry.result.type == "succeeded":
+                    _record_usage(entry.result.message, stats)
+                    inputs = row_inputs[i]
+                    skeleton = build_skeleton(inputs["schema_type"], inputs["url"], inputs["domain"])
+                    try:
+                        parsed_output = _parse_jsonld_response(entry.result.message, skeleton)
+                    except (TypeError, ValueError, KeyError, AttributeError, IndexError) as e:
+                        # One malformed response must not discard the rest of the batch
+                        outputs[i] = ("", f"Could not process response: {e}")
+                        continue
+                    outputs[i] = _cache_store(cache_keys[i], inputs["schema_type"], model, parsed_output)
+                elif entry.result.type == "errored":
+                    outputs[i] = ("", f"API error: {entry.result.error.error.message}")
+                else:
+                    outputs[i] = ("", f"Batch request {entry.result.type}")
+        except anthropic.APIError as e:
+            outputs = [out or ("", f"API error: {e}") for out in outputs]
+        finally:
+            _cancel_unfinished(client, batches)
+
+    return [out or ("", "No result returned for this row") for out in outputs]
+
+
+def _cancel_unfinished(client, batches):
+    """Cancel batches that have not ended so they stop running (and billing)."""
+    for b in batches:
+        if b.processing_status != "ended":
+            try:
+                client.messages.batches.cancel(b.id)
+            except anthropic.APIError:
+                pass  # best effort; the batch expires on its own
+
+
+WIRING_REVERSE_EDGES = {
+    "isRelatedTo": "isRelatedTo",
+    "isSimilarTo": "isSimilarTo",
+    "subOrganization": "parentOrganization",
+    "parentOrganization": "subOrganization",
+    "mainEntity": "subjectOf",
+    "subjectOf": "mainEntity",
+}
+SERVICE_FORBIDDEN_PROPERTIES = ("keywords", "datePublished", "dateModified", "dateCreated", "creator")
+SINGLE_VALUED_EDGES = {"mainEntity", "parentOrganization"}
+# Added as a single node first, matching the dual-type shape, but an entity can be the subject
+# of several pages (an Organization behind both AboutPage and ContactPage), so it grows into a list
+NODE_FIRST_EDGES = SINGLE_VALUED_EDGES | {"subjectOf"}
+
+
+def _entity_types(entity):
+    """An entity's @type as a tuple of type names; JSON-LD allows a single name or a list."""
+    etype = entity.get("@type")
+    if isinstance(etype, str):
+        return (etype,)
+    if isinstance(etype, list):
+        return tuple(t for t in etype if isinstance(t, str))
+    return ()
+
+
+def _ref_ids(value):
+    items = value if isinstance(value, list) else [value]
+    return [item["@id"] for item in items if isinstance(item, dict) and item.get("@id")]
+
+
+def _walk_entities(obj, block_index, definitions, references):
+    """Collect typed nodes with an @id as definitions and bare {"@id"} nodes as references."""
+    if isinstance(obj, list):
+        for item in obj:
+            _walk_entities(item, block_index, definitions, references)
+    elif isinstance(obj, dict):
+        if obj.get("@id"):
+            if obj.get("@type"):
+                definitions.setdefault(obj["@id"], []).append((block_index, obj))
+            elif len(obj) == 1:
+                references.append((block_index, obj["@id"]))
+        for val in obj.values():
+            if isinstance(val, (dict, list)):
+                _walk_entities(val, block_index, definitions, references)
+
+
+def find_wiring_violations(blocks):
+    """Check graph integrity locally. Returns a list of (block_index, message); an empty list
+    means the LLM wiring pass has nothing structural to fix."""
+    definitions, references = {}, []
+    for i, block in enumerate(blocks):
+        _walk_entities(block, i, definitions, references)
+    violations = []
+
+    for i, ref in references:
+        if ref not in definitions and not ref.startswith(EXTERNAL_ID_PREFIXES):
+            violations.append((i, f"Unresolved @id reference: {ref}"))
+
+    for entity_id, defs in definitions.items():
+        i, entity = defs[0]
+        types = _entity_types(entity)
+        if not types:
+            violations.append((i, f"{entity_id} has an unrecognised @type: {entity['@type']!r}"))
+        for prop, reverse in WIRING_REVERSE_EDGES.items():
+            for target_id in _ref_ids(entity.get(prop)):
+                target_defs = definitions.get(target_id)
+                if target_defs and not any(
+                        entity_id in _ref_ids(target.get(reverse)) for _, target in target_defs):
+                    violations.append((target_defs[0][0],
+                        f"{target_id} is missing {reverse} → {entity_id} (reverse of {prop})"))
+        if "Service" in types:
+            for prop in SERVICE_FORBIDDEN_PROPERTIES:
+                if prop in entity:
+                    violations.append((i, f"Service {entity_id} must not have '{prop}'"))
+        if "Organization" in types:
+            listed = set(_ref_ids(entity.get("subOrganization")))
+            for lb_id, lb_defs in definitions.items():
+                if "LocalBusiness" in _entity_types(lb_defs[0][1]) and lb_id not in listed:
+                    violations.append((i, f"Organization {entity_id} does not list {lb_id} in subOrganization"))
+
+    return violations
+
+
+def _add_ref(entity, prop, ref_id):
+    """Add an {"@id"} reference under prop, as a single node or appended to a list."""
+    current = entity.get(prop)
+    if current is None:
+        entity[prop] = {"@id": ref_id} if prop in NODE_FIRST_EDGES else [{"@id": ref_id}]
+    elif prop in SINGLE_VALUED_EDGES:
+        return False  # already points elsewhere; leave it for the violation report
+    else:
+        entity[prop] = (current if isinstance(current, list) else [current]) + [{"@id": ref_id}]
+    return True
+
+
+def _merge_values(entity, prop, value):
+    """Set prop to value, or merge both into a list when prop is already present."""
+    if prop not in entity:
+        entity[prop] = value
+        return
+    current = entity[prop] if isinstance(entity[prop], list) else [entity[prop]]
+    extra = [item for item in (value if isinstance(value, list) else [value]) if item not in current]
+    if extra:
+        entity[prop] = current + extra
+
+
+def wire_graph_locally(blocks):
+    """Fix the structural problems find_wiring_violations can resolve without a model.
+
+    Renames deprecated properties, drops properties invalid for the entity's @type, adds
+    missing reverse edges and lists every LocalBusiness under the Organization. Blocks are
+    changed in place; returns the sorted indices of the blocks that were touched. Unresolved
+    @id references are left alone for the LLM wiring pass.
+    """
+    definitions, references = {}, []
+    for i, block in enumerate(blocks):
+        _walk_entities(block, i, definitions, references)
+    changed = set()
+
+    for defs in definitions.values():
+        for i, entity in defs:
+            for prop in DEPRECATED_PROPERTIES.keys() & entity.keys():
+                value = entity.pop(prop)
+                target = DEPRECATED_PROPERTY_RENAMES.get(prop)
+                if target:
+                    _merge_values(entity, target, value)
+                changed.add(i)
+            types = _entity_types(entity)
+            forbidden = set()
+            for etype in types:
+                forbidden.update(INVALID_PROPERTIES.get(etype, ()))
+            if "Service" in types:
+                forbidden.update(SERVICE_FORBIDDEN_PROPERTIES)
+            for prop in forbidden & entity.keys():
+                del entity[prop]
+                changed.add(i)
+
+    for entity_id, defs in definitions.items():
+        entity = defs[0][1]
+        # Listed first so the reverse-edge step below gives each LocalBusiness its parentOrganization
+        if "Organization" in _entity_types(entity):
+            listed = set(_ref_ids(entity.get("subOrganization")))
+            for lb_id, lb_defs in definitions.items():
+                if "LocalBusiness" in _entity_types(lb_defs[0][1]) and lb_id not in listed:
+                    _add_ref(entity, "subOrganization", lb_id)
+                    changed.add(defs[0][0])
+        for prop, reverse in WIRING_REVERSE_EDGES.items():
+            for target_id in _ref_ids(entity.get(prop)):
+                target_defs = definitions.get(target_id)
+                if not target_defs or any(
+                        entity_id in _ref_ids(target.get(reverse)) for _, target in target_defs):
+                    continue
+                j, target = target_defs[0]
+                if _add_ref(target, reverse, entity_id):
+                    changed.add(j)
+
+    return sorted(changed)
+
+
+def _build_wiring_prompt(blocks, known_ids=(), violations=()):
+    blocks_json = orjson.dumps(blocks).decode()  # compact: indentation only costs input tokens
+    context_text = ""
+    if known_ids:
+        context_text = "\n## @ids Defined Elsewhere in This Batch\n" + "\n".join(
+            f"- {entity_id}" for entity_id in sorted(known_ids)) + "\n"
+    if violations:
+        context_text += "\n## Issues Found by Local Check\n" + "\n".join(
+            f"- {message}" for message in violations) + "\n"
+
+    return f"""Review these JSON-LD blocks for graph integrity and fix any issues.
 
 ## All Generated JSON-LD Blocks
 {blocks_json}
-
+{context_text}
 ## Checks to Perform
 1. Every @id reference must resolve to a defined entity or be external (Wikidata, etc.)
 2. Bidirectional relationships:
@@ -190,23 +835,49 @@ def graph_wiring_pass(api_key, all_jsonld_blocks, model="claude-sonnet-4-2025051
 ## Output Format
 Return a JSON array of the corrected blocks. ONLY raw JSON array."""
 
-    client = anthropic.Anthropic(api_key=api_key)
+
+def _parse_wiring_response(message, blocks):
+    """Return (corrected_blocks, error). Falls back to the input blocks on any problem,
+    including a block count mismatch, so callers can always merge by position."""
+    raw = _strip_fences(message.content[0].text)
+    try:
+        corrected = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return blocks, "Graph wiring response was not valid JSON. Using originals."
+    if not isinstance(corrected, list):
+        return blocks, "Graph wiring returned unexpected format. Using originals."
+    if len(corrected) != len(blocks):
+        return blocks, (f"Graph wiring returned {len(corrected)} blocks for {len(blocks)} inputs. "
+                        "Using originals.")
+    return corrected, ""
+
+
+def _wiring_max_tokens(blocks):
+    """Output budget for a wiring call: about two thirds of the blocks' JSON length, which
+    comfortably covers re-emitting them, capped at WIRING_MAX_TOKENS."""
+    return max(1024, min(WIRING_MAX_TOKENS, 2 * len(orjson.dumps(blocks)) // 3))
+
+
+async def graph_wiring_pass_async(
+    client, blocks, model=WIRING_MODEL, known_ids=(), violations=(),
+    limiter=None, stats=None,
+):
+    """Wire one chunk of blocks. ``known_ids`` lists @ids defined outside the chunk so
+    cross-chunk references are kept, and ``violations`` lists what the local check found.
+    Results are memoized by chunk content."""
+    user_prompt = _build_wiring_prompt(blocks, known_ids, violations)
+    cache_key = _jsonld_cache_key(model, "wiring", user_prompt)
+    cached = _cache_lookup(cache_key, stats)
+    if cached is not None:
+        return cached, ""
+
     try:
-        message = client.messages.create(
-            model=model, max_tokens=16000, system=SYSTEM_PROMPT,
+        message = await _stream_message(
+            client, limiter, model=model, max_tokens=_wiring_max_tokens(blocks),
+            system=[{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
             messages=[{"role": "user", "content": user_prompt}],
         )
-        raw = message.content[0].text.strip()
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[-1]
-        if raw.endswith("```"):
-            raw = raw.rsplit("```", 1)[0]
-        raw = raw.strip()
-        corrected = json.loads(raw)
-        if isinstance(corrected, list):
-            return corrected, "Graph wiring pass completed successfully."
-        return all_jsonld_blocks, "Graph wiring returned unexpected format. Using originals."
-    except json.JSONDecodeError:
-        return all_jsonld_blocks, "Graph wiring response was not valid JSON. Using originals."
+        _record_usage(message, stats)
+        return _cache_store(cache_key, "wiring", model, _parse_wiring_response(message, blocks))
     except Exception as e:
-        return all_jsonld_blocks, f"Graph wiring error: {e}. Using originals."
+        return blocks, f"Graph wiring error: {e}. Using originals."
@@ -4,312 +4,314 @@ Contains JSON-LD templates, validation rules, Wikidata URIs, and schema rules.
 Updated with dual-type support (WebContent|Service, WebContent|Person, etc.)
 """
 
+from types import MappingProxyType
+
 # ─── JSON-LD Templates ───────────────────────────────────────────────────────
 
 TEMPLATES = {
-    "Organization": """{
-  "@context": "https://schema.org",
-  "@type": "Organization",
-  "@id": "{{domain}}/#Organization",
-  "name": "{{business_name}}",
-  "legalName": "{{legal_name}}",
-  "description": "{{description_150_300_chars}}",
-  "disambiguatingDescription": "{{extended_description}}",
-  "url": "{{domain}}/",
-  "logo": "{{logo_url}}",
-  "image": "{{image_url}}",
-  "telephone": "+1{{phone_no_formatting}}",
-  "email": "{{email}}",
-  "foundingDate": "{{YYYY-MM-DD}}",
-  "foundingLocation": { "@id": "{{wikidata_city_uri}}" },
-  "numberOfEmployees": "{{number}}",
-  "address": {
-    "@type": "PostalAddress",
-    "@id": "{{domain}}/#PostalAddress",
-    "name": "{{business_name}} - Address",
-    "streetAddress": "{{street}}",
-    "addressLocality": "{{city}}",
-    "addressRegion": "{{state_abbrev}}",
-    "postalCode": "{{zip}}",
-    "addressCountry": {
-      "@type": "Country",
-      "name": "United States",
-      "@id": "http://www.wikidata.org/entity/Q30"
-    }
-  },
-  "location": { "@id": "{{domain}}/#PostalAddress" },
-  "areaServed": [],
-  "sameAs": [],
-  "keywords": [],
-  "subOrganization": []
-}""",
-
-    "LocalBusiness": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "GeoCoordinates",
-      "@id": "{{url}}#GeoCoordinates",
-      "name": "{{location_name}} Geocoordinates",
-      "latitude": "{{latitude}}",
-      "longitude": "{{longitude}}"
+    "Organization": {
+        "@context": "https://schema.org",
+        "@type": "Organization",
+        "@id": "{{domain}}/#Organization",
+        "name": "{{business_name}}",
+        "legalName": "{{legal_name}}",
+        "description": "{{description_150_300_chars}}",
+        "disambiguatingDescription": "{{extended_description}}",
+        "url": "{{domain}}/",
+        "logo": "{{logo_url}}",
+        "image": "{{image_url}}",
+        "telephone": "+1{{phone_no_formatting}}",
+        "email": "{{email}}",
+        "foundingDate": "{{YYYY-MM-DD}}",
+        "foundingLocation": {"@id": "{{wikidata_city_uri}}"},
+        "numberOfEmployees": "{{number}}",
+        "address": {
+            "@type": "PostalAddress",
+            "@id": "{{domain}}/#PostalAddress",
+            "name": "{{business_name}} - Address",
+            "streetAddress": "{{street}}",
+            "addressLocality": "{{city}}",
+            "addressRegion": "{{state_abbrev}}",
+            "postalCode": "{{zip}}",
+            "addressCountry": {
+                "@type": "Country",
+                "name": "United States",
+                "@id": "http://www.wikidata.org/entity/Q30",
+            },
+        },
+        "location": {"@id": "{{domain}}/#PostalAddress"},
+        "areaServed": [],
+        "sameAs": [],
+        "keywords": [],
+        "subOrganization": [],
     },
-    {
-      "@type": "LocalBusiness",
-      "@id": "{{url}}#LocalBusiness",
-      "name": "{{business_name}} - {{location_name}}",
-      "legalName": "{{legal_name}}",
-      "alternateName": "{{alternate_name}}",
-      "description": "{{description}}",
-      "disambiguatingDescription": "{{extended_description}}",
-      "url": "{{url}}",
-      "logo": "{{logo_url}}",
-      "telephone": "+1{{phone}}",
-      "email": "{{email}}",
-      "priceRange": "$$",
-      "address": {
-        "@type": "PostalAddress",
-        "@id": "{{url}}#PostalAddress",
-        "streetAddress": "{{street}}",
-        "addressLocality": "{{city}}",
-        "addressRegion": "{{state}}",
-        "postalCode": "{{zip}}",
-        "addressCountry": { "@id": "http://www.wikidata.org/entity/Q30" }
-      },
-      "geo": { "@id": "{{url}}#GeoCoordinates" },
-      "hasMap": "{{google_maps_url}}",
-      "parentOrganization": { "@id": "{{domain}}/#Organization" },
-      "areaServed": [],
-      "openingHoursSpecification": {
-        "@type": "OpeningHoursSpecification",
-        "dayOfWeek": ["Monday","Tuesday","Wednesday","Thursday","Friday"],
-        "opens": "08:00:00",
-        "closes": "17:00:00"
-      },
-      "sameAs": [],
-      "keywords": []
-    }
-  ]
-}""",
 
-    "WebContent|Service": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "WebContent",
-      "@id": "{{url}}#WebContent",
-      "headline": "{{h1_title}}",
-      "description": "{{description}}",
-      "url": "{{url}}",
-      "image": "{{featured_image_url}}",
-      "dateModified": "{{ISO_date}}",
-      "datePublished": "{{ISO_date}}",
-      "keywords": [],
-      "about": { "@id": "{{domain}}/#Organization" },
-      "creator": { "@id": "{{domain}}/#Organization" },
-      "contributor": { "@id": "{{domain}}/#Organization" },
-      "maintainer": { "@id": "{{domain}}/#Organization" },
-      "contentLocation": { "@id": "{{wikidata_metro_area}}" },
-      "locationCreated": { "@id": "{{wikidata_city}}" },
-      "countryOfOrigin": { "@id": "http://www.wikidata.org/entity/Q30" },
-      "mainEntity": { "@id": "{{url}}#Service" }
+    "LocalBusiness": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "GeoCoordinates",
+                "@id": "{{url}}#GeoCoordinates",
+                "name": "{{location_name}} Geocoordinates",
+                "latitude": "{{latitude}}",
+                "longitude": "{{longitude}}",
+            },
+            {
+                "@type": "LocalBusiness",
+                "@id": "{{url}}#LocalBusiness",
+                "name": "{{business_name}} - {{location_name}}",
+                "legalName": "{{legal_name}}",
+                "alternateName": "{{alternate_name}}",
+                "description": "{{description}}",
+                "disambiguatingDescription": "{{extended_description}}",
+                "url": "{{url}}",
+                "logo": "{{logo_url}}",
+                "telephone": "+1{{phone}}",
+                "email": "{{email}}",
+                "priceRange": "$$",
+                "address": {
+                    "@type": "PostalAddress",
+                    "@id": "{{url}}#PostalAddress",
+                    "streetAddress": "{{street}}",
+                    "addressLocality": "{{city}}",
+                    "addressRegion": "{{state}}",
+                    "postalCode": "{{zip}}",
+                    "addressCountry": {"@id": "http://www.wikidata.org/entity/Q30"},
+                },
+                "geo": {"@id": "{{url}}#GeoCoordinates"},
+                "hasMap": "{{google_maps_url}}",
+                "parentOrganization": {"@id": "{{domain}}/#Organization"},
+                "areaServed": [],
+                "openingHoursSpecification": {
+                    "@type": "OpeningHoursSpecification",
+                    "dayOfWeek": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+                    "opens": "08:00:00",
+                    "closes": "17:00:00",
+                },
+                "sameAs": [],
+                "keywords": [],
+            },
+        ],
     },
-    {
-      "@type": "Service",
-      "@id": "{{url}}#Service",
-      "name": "{{service_name}}",
-      "serviceType": "{{service_category}}",
-      "description": "{{service_description}}",
-      "disambiguatingDescription": "{{extended_description}}",
-      "url": "{{url}}",
-      "logo": "{{logo_url}}",
-      "provider": { "@id": "{{domain}}/#Organization" },
-      "brand": { "@id": "{{domain}}/#Organization" },
-      "areaServed": [],
-      "sameAs": [],
-      "isRelatedTo": [],
-      "isSimilarTo": [],
-      "hasOfferCatalog": {
-        "@type": "OfferCatalog",
-        "@id": "{{url}}#OfferCatalog",
-        "name": "{{service_name}} Services",
-        "itemListElement": []
-      },
-      "subjectOf": { "@id": "{{url}}#WebContent" }
-    }
-  ]
-}""",
 
-    "WebContent|Person": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "WebContent",
-      "@id": "{{url}}#WebContent",
-      "headline": "{{page_title}}",
-      "description": "{{description}}",
-      "url": "{{url}}",
-      "dateModified": "{{ISO_date}}",
-      "keywords": [],
-      "about": { "@id": "{{domain}}/#Organization" },
-      "creator": { "@id": "{{domain}}/#Organization" },
-      "mainEntity": { "@id": "{{url}}#Person" }
+    "WebContent|Service": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "WebContent",
+                "@id": "{{url}}#WebContent",
+                "headline": "{{h1_title}}",
+                "description": "{{description}}",
+                "url": "{{url}}",
+                "image": "{{featured_image_url}}",
+                "dateModified": "{{ISO_date}}",
+                "datePublished": "{{ISO_date}}",
+                "keywords": [],
+                "about": {"@id": "{{domain}}/#Organization"},
+                "creator": {"@id": "{{domain}}/#Organization"},
+                "contributor": {"@id": "{{domain}}/#Organization"},
+                "maintainer": {"@id": "{{domain}}/#Organization"},
+                "contentLocation": {"@id": "{{wikidata_metro_area}}"},
+                "locationCreated": {"@id": "{{wikidata_city}}"},
+                "countryOfOrigin": {"@id": "http://www.wikidata.org/entity/Q30"},
+                "mainEntity": {"@id": "{{url}}#Service"},
+            },
+            {
+                "@type": "Service",
+                "@id": "{{url}}#Service",
+                "name": "{{service_name}}",
+                "serviceType": "{{service_category}}",
+                "description": "{{service_description}}",
+                "disambiguatingDescription": "{{extended_description}}",
+                "url": "{{url}}",
+                "logo": "{{logo_url}}",
+                "provider": {"@id": "{{domain}}/#Organization"},
+                "brand": {"@id": "{{domain}}/#Organization"},
+                "areaServed": [],
+                "sameAs": [],
+                "isRelatedTo": [],
+                "isSimilarTo": [],
+                "hasOfferCatalog": {
+                    "@type": "OfferCatalog",
+                    "@id": "{{url}}#OfferCatalog",
+                    "name": "{{service_name}} Services",
+                    "itemListElement": [],
+                },
+                "subjectOf": {"@id": "{{url}}#WebContent"},
+            },
+        ],
     },
-    {
-      "@type": "Person",
-      "@id": "{{url}}#Person",
-      "name": "{{full_name}}",
-      "givenName": "{{first_name}}",
-      "familyName": "{{last_name}}",
-      "jobTitle": "{{job_title}}",
-      "description": "{{bio_description}}",
-      "url": "{{url}}",
-      "image": {
-        "@type": "ImageObject",
-        "url": "{{headshot_url}}",
-        "caption": "{{full_name}}, {{job_title}}"
-      },
-      "worksFor": { "@id": "{{domain}}/#Organization" },
-      "sameAs": [],
-      "alumniOf": [],
-      "knowsAbout": [],
-      "subjectOf": { "@id": "{{url}}#WebContent" }
-    }
-  ]
-}""",
 
-    "WebContent|LocalBusiness": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "WebContent",
-      "@id": "{{url}}#WebContent",
-      "headline": "{{page_title}}",
-      "description": "{{description}}",
-      "url": "{{url}}",
-      "dateModified": "{{ISO_date}}",
-      "keywords": [],
-      "about": { "@id": "{{domain}}/#Organization" },
-      "creator": { "@id": "{{domain}}/#Organization" },
-      "mainEntity": { "@id": "{{url}}#LocalBusiness" }
+    "WebContent|Person": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "WebContent",
+                "@id": "{{url}}#WebContent",
+                "headline": "{{page_title}}",
+                "description": "{{description}}",
+                "url": "{{url}}",
+                "dateModified": "{{ISO_date}}",
+                "keywords": [],
+                "about": {"@id": "{{domain}}/#Organization"},
+                "creator": {"@id": "{{domain}}/#Organization"},
+                "mainEntity": {"@id": "{{url}}#Person"},
+            },
+            {
+                "@type": "Person",
+                "@id": "{{url}}#Person",
+                "name": "{{full_name}}",
+                "givenName": "{{first_name}}",
+                "familyName": "{{last_name}}",
+                "jobTitle": "{{job_title}}",
+                "description": "{{bio_description}}",
+                "url": "{{url}}",
+                "image": {
+                    "@type": "ImageObject",
+                    "url": "{{headshot_url}}",
+                    "caption": "{{full_name}}, {{job_title}}",
+                },
+                "worksFor": {"@id": "{{domain}}/#Organization"},
+                "sameAs": [],
+                "alumniOf": [],
+                "knowsAbout": [],
+                "subjectOf": {"@id": "{{url}}#WebContent"},
+            },
+        ],
     },
-    {
-      "@type": "GeoCoordinates",
-      "@id": "{{url}}#GeoCoordinates",
-      "latitude": "{{latitude}}",
-      "longitude": "{{longitude}}"
+
+    "WebContent|LocalBusiness": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "WebContent",
+                "@id": "{{url}}#WebContent",
+                "headline": "{{page_title}}",
+                "description": "{{description}}",
+                "url": "{{url}}",
+                "dateModified": "{{ISO_date}}",
+                "keywords": [],
+                "about": {"@id": "{{domain}}/#Organization"},
+                "creator": {"@id": "{{domain}}/#Organization"},
+                "mainEntity": {"@id": "{{url}}#LocalBusiness"},
+            },
+            {
+                "@type": "GeoCoordinates",
+                "@id": "{{url}}#GeoCoordinates",
+                "latitude": "{{latitude}}",
+                "longitude": "{{longitude}}",
+            },
+            {
+                "@type": "LocalBusiness",
+                "@id": "{{url}}#LocalBusiness",
+                "name": "{{business_name}} - {{location_name}}",
+                "description": "{{location_description}}",
+                "url": "{{url}}",
+                "logo": "{{logo_url}}",
+                "telephone": "+1{{phone}}",
+                "address": {
+                    "@type": "PostalAddress",
+                    "@id": "{{url}}#PostalAddress",
+                    "streetAddress": "{{street}}",
+                    "addressLocality": "{{city}}",
+                    "addressRegion": "{{state}}",
+                    "postalCode": "{{zip}}",
+                    "addressCountry": {"@id": "http://www.wikidata.org/entity/Q30"},
+                },
+                "geo": {"@id": "{{url}}#GeoCoordinates"},
+                "hasMap": "{{google_maps_url}}",
+                "parentOrganization": {"@id": "{{domain}}/#Organization"},
+                "subjectOf": {"@id": "{{url}}#WebContent"},
+            },
+        ],
     },
-    {
-      "@type": "LocalBusiness",
-      "@id": "{{url}}#LocalBusiness",
-      "name": "{{business_name}} - {{location_name}}",
-      "description": "{{location_description}}",
-      "url": "{{url}}",
-      "logo": "{{logo_url}}",
-      "telephone": "+1{{phone}}",
-      "address": {
-        "@type": "PostalAddress",
-        "@id": "{{url}}#PostalAddress",
-        "streetAddress": "{{street}}",
-        "addressLocality": "{{city}}",
-        "addressRegion": "{{state}}",
-        "postalCode": "{{zip}}",
-        "addressCountry": { "@id": "http://www.wikidata.org/entity/Q30" }
-      },
-      "geo": { "@id": "{{url}}#GeoCoordinates" },
-      "hasMap": "{{google_maps_url}}",
-      "parentOrganization": { "@id": "{{domain}}/#Organization" },
-      "subjectOf": { "@id": "{{url}}#WebContent" }
-    }
-  ]
-}""",
 
-    "Service": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "Service",
-      "@id": "{{url}}#Service",
-      "name": "{{service_name}}",
-      "serviceType": "{{service_category}}",
-      "description": "{{description}}",
-      "disambiguatingDescription": "{{extended_description}}",
-      "url": "{{url}}",
-      "logo": "{{logo_url}}",
-      "provider": { "@id": "{{domain}}/#Organization" },
-      "brand": { "@id": "{{domain}}/#Organization" },
-      "areaServed": [],
-      "sameAs": [],
-      "isRelatedTo": [],
-      "isSimilarTo": []
-    }
-  ]
-}""",
+    "Service": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "Service",
+                "@id": "{{url}}#Service",
+                "name": "{{service_name}}",
+                "serviceType": "{{service_category}}",
+                "description": "{{description}}",
+                "disambiguatingDescription": "{{extended_description}}",
+                "url": "{{url}}",
+                "logo": "{{logo_url}}",
+                "provider": {"@id": "{{domain}}/#Organization"},
+                "brand": {"@id": "{{domain}}/#Organization"},
+                "areaServed": [],
+                "sameAs": [],
+                "isRelatedTo": [],
+                "isSimilarTo": [],
+            },
+        ],
+    },
 
-    "WebContent": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "WebContent",
-      "@id": "{{url}}#WebContent",
-      "headline": "{{h1_title}}",
-      "description": "{{description}}",
-      "url": "{{url}}",
-      "image": "{{featured_image_url}}",
-      "datePublished": "{{YYYY-MM-DD}}",
-      "dateModified": "{{ISO_datetime}}",
-      "about": { "@id": "{{domain}}/#Organization" },
-      "creator": { "@id": "{{domain}}/#Organization" },
-      "contributor": { "@id": "{{domain}}/#Organization" },
-      "maintainer": { "@id": "{{domain}}/#Organization" },
-      "contentLocation": { "@id": "{{wikidata_metro_area}}" },
-      "locationCreated": { "@id": "{{wikidata_city}}" },
-      "countryOfOrigin": { "@id": "http://www.wikidata.org/entity/Q30" },
-      "mentions": [],
-      "keywords": []
-    }
-  ]
-}""",
+    "WebContent": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "WebContent",
+                "@id": "{{url}}#WebContent",
+                "headline": "{{h1_title}}",
+                "description": "{{description}}",
+                "url": "{{url}}",
+                "image": "{{featured_image_url}}",
+                "datePublished": "{{YYYY-MM-DD}}",
+                "dateModified": "{{ISO_datetime}}",
+                "about": {"@id": "{{domain}}/#Organization"},
+                "creator": {"@id": "{{domain}}/#Organization"},
+                "contributor": {"@id": "{{domain}}/#Organization"},
+                "maintainer": {"@id": "{{domain}}/#Organization"},
+                "contentLocation": {"@id": "{{wikidata_metro_area}}"},
+                "locationCreated": {"@id": "{{wikidata_city}}"},
+                "countryOfOrigin": {"@id": "http://www.wikidata.org/entity/Q30"},
+                "mentions": [],
+                "keywords": [],
+            },
+        ],
+    },
 
-    "AboutPage": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "AboutPage",
-      "@id": "{{url}}#AboutPage",
-      "name": "{{page_title}}",
-      "description": "{{description}}",
-      "url": "{{url}}",
-      "about": { "@id": "{{domain}}/#Organization" },
-      "mainEntity": { "@id": "{{domain}}/#Organization" }
-    }
-  ]
-}""",
+    "AboutPage": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "AboutPage",
+                "@id": "{{url}}#AboutPage",
+                "name": "{{page_title}}",
+                "description": "{{description}}",
+                "url": "{{url}}",
+                "about": {"@id": "{{domain}}/#Organization"},
+                "mainEntity": {"@id": "{{domain}}/#Organization"},
+            },
+        ],
+    },
 
-    "Person": """{
-  "@context": "https://schema.org",
-  "@graph": [
-    {
-      "@type": "Person",
-      "@id": "{{url}}#Person",
-      "name": "{{full_name}}",
-      "givenName": "{{first_name}}",
-      "familyName": "{{last_name}}",
-      "jobTitle": "{{job_title}}",
-      "description": "{{bio_description}}",
-      "url": "{{url}}",
-      "image": {
-        "@type": "ImageObject",
-        "url": "{{headshot_url}}",
-        "caption": "{{full_name}}, {{job_title}}"
-      },
-      "worksFor": { "@id": "{{domain}}/#Organization" },
-      "sameAs": [],
-      "alumniOf": [],
-      "knowsAbout": []
-    }
-  ]
-}"""
+    "Person": {
+        "@context": "https://schema.org",
+        "@graph": [
+            {
+                "@type": "Person",
+                "@id": "{{url}}#Person",
+                "name": "{{full_name}}",
+                "givenName": "{{first_name}}",
+                "familyName": "{{last_name}}",
+                "jobTitle": "{{job_title}}",
+                "description": "{{bio_description}}",
+                "url": "{{url}}",
+                "image": {
+                    "@type": "ImageObject",
+                    "url": "{{headshot_url}}",
+                    "caption": "{{full_name}}, {{job_title}}",
+                },
+                "worksFor": {"@id": "{{domain}}/#Organization"},
+                "sameAs": [],
+                "alumniOf": [],
+                "knowsAbout": [],
+            },
+        ],
+    },
 }
 
 # ─── Dual-Type Validation ────────────────────────────────────────────────────
@@ -344,14 +346,14 @@ NESTED_ONLY_PROPERTIES = {
 
 # ─── Common Wikidata URIs ────────────────────────────────────────────────────
 
-WIKIDATA_COUNTRIES = {
+WIKIDATA_COUNTRIES = MappingProxyType({
     "United States": "http://www.wikidata.org/entity/Q30",
     "Canada": "http://www.wikidata.org/entity/Q16",
     "United Kingdom": "http://www.wikidata.org/entity/Q145",
     "Mexico": "http://www.wikidata.org/entity/Q96",
-}
+})
 
-WIKIDATA_STATES = {
+WIKIDATA_STATES = MappingProxyType({
     "Alabama": "http://www.wikidata.org/entity/Q173", "Alaska": "http://www.wikidata.org/entity/Q797",
     "Arizona": "http://www.wikidata.org/entity/Q816", "Arkansas": "http://www.wikidata.org/entity/Q1612",
     "California": "http://www.wikidata.org/entity/Q99", "Colorado": "http://www.wikidata.org/entity/Q1261",
@@ -377,9 +379,9 @@ WIKIDATA_STATES = {
     "Vermont": "http://www.wikidata.org/entity/Q16551", "Virginia": "http://www.wikidata.org/entity/Q1370",
     "Washington": "http://www.wikidata.org/entity/Q1223", "West Virginia": "http://www.wikidata.org/entity/Q1371",
     "Wisconsin": "http://www.wikidata.org/entity/Q1537", "Wyoming": "http://www.wikidata.org/entity/Q1214",
-}
+})
 
-WIKIDATA_CITIES = {
+WIKIDATA_CITIES = MappingProxyType({
     "New York City, NY": "http://www.wikidata.org/entity/Q60",
     "Los Angeles, CA": "http://www.wikidata.org/entity/Q65",
     "Chicago, IL": "http://www.wikidata.org/entity/Q1297",
@@ -400,9 +402,9 @@ WIKIDATA_CITIES = {
     "Miami, FL": "http://www.wikidata.org/entity/Q8652",
     "Atlanta, GA": "http://www.wikidata.org/entity/Q23556",
     "Minneapolis, MN": "http://www.wikidata.org/entity/Q36091",
-}
+})
 
-WIKIDATA_SERVICE_CONCEPTS = {
+WIKIDATA_SERVICE_CONCEPTS = MappingProxyType({
     "Water damage": "http://www.wikidata.org/entity/Q929023",
     "Fire": "http://www.wikidata.org/entity/Q3196",
     "Mold": "http://www.wikidata.org/entity/Q37212",
@@ -413,7 +415,7 @@ WIKIDATA_SERVICE_CONCEPTS = {
     "Construction": "http://www.wikidata.org/entity/Q385378",
     "Restoration": "http://www.wikidata.org/entity/Q217845",
     "Cleaning": "http://www.wikidata.org/entity/Q507166",
-}
+})
 
 # ─── URL Pattern → Type Inference (updated with dual-type defaults) ──────────
 
@@ -434,6 +436,10 @@ URL_TYPE_PATTERNS = [
     (r"^/areas-we-serve/.+/?$", "WebContent", "Medium"),
 ]
 
+# @id references under these prefixes point outside the batch (Wikidata, Google) and never need
+# a definition; shared by validator Rule 13 and the local graph wiring check
+EXTERNAL_ID_PREFIXES = ("http://www.wikidata.org", "https://g.co", "https://www.google.com/maps")
+
 DEPRECATED_TYPES = {
     "WebPage": "Do not use - implied by URL. Use WebContent for content pages",
     "WebSite": "Do not use - implied by domain",
@@ -446,6 +452,13 @@ DEPRECATED_PROPERTIES = {
     "isBasedOnUrl": "isBasedOn",
 }
 
+# Mechanical replacements for the deprecated properties above; anything deprecated but not
+# listed here ("relatedLink or remove") is dropped rather than guessed at
+DEPRECATED_PROPERTY_RENAMES = {
+    "serviceArea": "areaServed",
+    "isBasedOnUrl": "isBasedOn",
+}
+
 INVALID_PROPERTIES = {
     "Service": ["keywords", "email", "telephone", "address", "foundingDate",
                 "datePublished", "dateModified", "dateCreated"],
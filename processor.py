@@ -3,34 +3,135 @@ Processing pipeline: CSV parsing, URL type inference (single + dual), hierarchy
 """
 
 import re
+import sys
 import csv
 import io
-import json
+import orjson
+import threading
+import functools
+import time
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.compute as pc
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
 from typing import Optional
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+from diskcache import Cache
 
 from knowledge import URL_TYPE_PATTERNS, VALID_DUAL_TYPES, INVALID_DUAL_TYPES
 
+PAGE_CACHE_DIR = ".cache/pages"
+PAGE_CACHE_TTL = 86400  # seconds
+PAGE_FRESH_FOR = 3600  # seconds a cached page is reused without revalidating
+PER_HOST_INTERVAL = 0.2  # seconds between request starts to the same host
+WIRING_CHUNK_SIZE = 16
+
+_PAGE_CACHE = None
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+SOCIAL_DOMAINS = (
+    "facebook.com", "linkedin.com", "twitter.com", "x.com",
+    "youtube.com", "instagram.com", "nextdoor.com", "bbb.org",
+    "yelp.com", "mapquest.com",
+)
+_SOCIAL_RE = re.compile("|".join(re.escape(d) for d in SOCIAL_DOMAINS))
+
+# All URL_TYPE_PATTERNS fused into one alternation; alternation order preserves
+# the list's first-match-wins priority and the group name indexes back into it.
+_URL_TYPE_RE = re.compile("|".join(
+    f"(?P<t{i}>{pattern})" for i, (pattern, _, _) in enumerate(URL_TYPE_PATTERNS)
+))
+
+
+def _literal_url_types():
+    """Normalized path -> (type, confidence) for the patterns that match one literal path
+    (/about, /services, ...). Entries are resolved through _URL_TYPE_RE itself, so the
+    fast path always agrees with the regex's first-match-wins order."""
+    table = {}
+    for pattern, _, _ in URL_TYPE_PATTERNS:
+        body = pattern.removeprefix("^").removesuffix("$").removesuffix("/?")
+        if re.fullmatch(r"[\w/-]*", body):
+            path = body.rstrip("/") + "/"
+            match = _URL_TYPE_RE.match(path)
+            if match:
+                table[path] = URL_TYPE_PATTERNS[int(match.lastgroup[1:])][1:]
+    return table
+
+
+_LITERAL_URL_TYPES = _literal_url_types()
+
 
 def parse_csv(file_content):
-    if isinstance(file_content, bytes):
-        file_content = file_content.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(file_content))
+    """Parse an uploaded CSV into row dicts with stripped keys and values, skipping rows
+    without a URL. Rectangular files are read by pyarrow's C parser; anything it cannot
+    take as-is (ragged rows, duplicate headers) goes through csv.reader instead."""
+    if isinstance(file_content, str):
+        file_content = file_content.encode("utf-8")
+    rows = _parse_csv_arrow(file_content)
+    if rows is None:
+        rows = _parse_csv_rows(io.TextIOWrapper(io.BytesIO(file_content), encoding="utf-8-sig", newline=""))
+    return rows
+
+
+def _parse_csv_arrow(data):
+    """pyarrow fast path for parse_csv. Returns None when the file needs the csv.reader path."""
+    # Slice only the first line; split() would also copy the rest of the file
+    end = data.find(b"\n")
+    header_line = data[:end if end != -1 else len(data)].decode("utf-8-sig", errors="replace")
+    headers = [h.strip() for h in next(csv.reader([header_line]), [])]
+    if "URL" not in headers or len(set(headers)) != len(headers):
+        return None
+    ragged = []
+    try:
+        table = pacsv.read_csv(
+            io.BytesIO(data),
+            read_options=pacsv.ReadOptions(column_names=headers, skip_rows=1),
+            parse_options=pacsv.ParseOptions(
+                newlines_in_values=True,
+                invalid_row_handler=lambda row: ragged.append(row) or "skip",
+            ),
+            convert_options=pacsv.ConvertOptions(
+                column_types={h: pa.string() for h in headers},
+                strings_can_be_null=False, quoted_strings_can_be_null=False,
+            ),
+        )
+    except pa.ArrowInvalid:
+        return None
+    if ragged:
+        return None
+    table = pa.table({h: pc.utf8_trim_whitespace(table[h]) for h in headers})
+    return table.filter(pc.not_equal(table["URL"], "")).to_pylist()
+
+
+def _parse_csv_rows(stream):
+    """Forgiving csv.reader path for parse_csv: short rows are padded with "".
+    Reads from a text stream so the upload is decoded line by line, not copied whole."""
+    reader = csv.reader(stream)
+    headers = [h.strip() for h in next(reader, [])]
+    if "URL" not in headers:
+        return []
+    url_idx = headers.index("URL")
+    padding = [""] * len(headers)
     rows = []
-    for row in reader:
-        cleaned = {k.strip(): v.strip() if v else "" for k, v in row.items()}
-        if cleaned.get("URL"):
-            rows.append(cleaned)
+    for values in reader:
+        # Skip rows without a URL before building their dict
+        if len(values) <= url_idx or not values[url_idx].strip():
+            continue
+        rows.append({h: v.strip() for h, v in zip(headers, values + padding)})
     return rows
 
 
+@functools.lru_cache(maxsize=4096)
 def extract_domain(url):
     parsed = urlparse(url)
     return f"{parsed.scheme}://{parsed.netloc}"
 
 
+@functools.lru_cache(maxsize=4096)
 def get_url_path(url):
     return urlparse(url).path
 
@@ -40,6 +141,7 @@ def is_dual_type(schema_type):
     return "|" in schema_type
 
 
+@functools.lru_cache(maxsize=64)
 def parse_dual_type(schema_type):
     """Parse a dual type string into (container_type, nested_type). Returns (type, None) for single."""
     if "|" in schema_type:
@@ -48,6 +150,7 @@ def parse_dual_type(schema_type):
     return schema_type, None
 
 
+@functools.lru_cache(maxsize=64)
 def validate_dual_type(schema_type):
     """Validate a dual-type combination. Returns (is_valid, error_message)."""
     if not is_dual_type(schema_type):
@@ -64,38 +167,56 @@ def validate_dual_type(schema_type):
     return True, ""
 
 
-def infer_schema_type(url):
+def infer_schema_type(url, path=None):
     """Infer schema type(s) from URL pattern. Returns (type_string, confidence)."""
-    path = get_url_path(url).rstrip("/") + "/"
+    if path is None:
+        path = get_url_path(url)
+    path = path.rstrip("/") + "/"
     if path == "/":
         return "Organization", "High"
-    for pattern, schema_type, confidence in URL_TYPE_PATTERNS:
-        if re.match(pattern, path):
-            return schema_type, confidence
+    literal = _LITERAL_URL_TYPES.get(path)
+    if literal:
+        return literal
+    match = _URL_TYPE_RE.match(path)
+    if match:
+        _, schema_type, confidence = URL_TYPE_PATTERNS[int(match.lastgroup[1:])]
+        return schema_type, confidence
     return "WebContent", "Low"
 
 
 def assign_types(rows):
-    """Assign schema types to rows. CSV override takes priority."""
+    """Assign schema types to rows. CSV override takes priority.
+
+    The dual-type fields depend only on the type string, so each distinct string is
+    resolved once and its fields are shared by every row using it.
+    """
+    type_fields = {}
     for row in rows:
-        if row.get("SchemaType"):
-            raw_type = row["SchemaType"]
+        # Parse the URL once; later stages read the cached path and domain
+        parsed = urlparse(row["URL"])
+        row["_path"] = parsed.path
+        row["_domain"] = f"{parsed.scheme}://{parsed.netloc}"
+        raw_type = row.get("SchemaType")
+        if raw_type:
+            # Each CSV cell is its own string object; intern so every row shares one per type
+            raw_type = sys.intern(raw_type)
             is_valid, error = validate_dual_type(raw_type)
-            if is_valid:
-                row["_inferred_type"] = raw_type
-                row["_type_confidence"] = "Override"
-            else:
-                row["_inferred_type"] = raw_type
-                row["_type_confidence"] = f"Override (INVALID: {error})"
+            row["_inferred_type"] = raw_type
+            row["_type_confidence"] = "Override" if is_valid else sys.intern(f"Override (INVALID: {error})")
         else:
-            inferred, confidence = infer_schema_type(row["URL"])
+            inferred, confidence = infer_schema_type(row["URL"], row["_path"])
             row["_inferred_type"] = inferred
             row["_type_confidence"] = confidence
         # Parse dual-type components for display
-        container, nested = parse_dual_type(row["_inferred_type"])
-        row["_container_type"] = container
-        row["_nested_type"] = nested if nested else ""
-        row["_is_dual"] = bool(nested)
+        fields = type_fields.get(row["_inferred_type"])
+        if fields is None:
+            container, nested = parse_dual_type(row["_inferred_type"])
+            fields = type_fields[row["_inferred_type"]] = {
+                "_container_type": container,
+                "_nested_type": nested if nested else "",
+                "_is_dual": bool(nested),
+            }
+        row.update(fields)
     return rows
 
 
@@ -109,17 +230,17 @@ def get_primary_entity_type(row):
 
 def build_service_hierarchy(rows):
     """Build parent/child/sibling relationships from service URLs."""
-    service_urls = []
+    paths = {}
     for r in rows:
         primary = get_primary_entity_type(r)
         if primary == "Service":
-            service_urls.append(r["URL"])
-    if not service_urls:
+            paths[r["URL"]] = r["_path"] if "_path" in r else get_url_path(r["URL"])
+    if not paths:
         return {}
 
     hierarchy = {}
-    for url in service_urls:
-        path = get_url_path(url).strip("/")
+    for url in paths:
+        path = paths[url].strip("/")
         segments = [s for s in path.split("/") if s]
         hierarchy[url] = {
             "segments": segments,
@@ -129,23 +250,20 @@ def build_service_hierarchy(rows):
             "siblings": [],
         }
 
+    # Parent = the service whose path is this one minus its last segment: one dict lookup.
+    # URLs sharing a path (e.g. with a query string) all list the child; the last is its parent.
+    by_segments = {}
     for url, info in hierarchy.items():
-        for other_url, other_info in hierarchy.items():
-            if url == other_url:
-                continue
-            if (other_info["depth"] == info["depth"] - 1 and
-                    get_url_path(url).startswith(get_url_path(other_url).rstrip("/"))):
-                info["parent"] = other_url
-                other_info["children"].append(url)
-
+        by_segments.setdefault(tuple(info["segments"]), []).append(url)
     for url, info in hierarchy.items():
-        for other_url, other_info in hierarchy.items():
-            if url == other_url:
-                continue
-            if (info["parent"] and info["parent"] == other_info.get("parent")
-                    and info["depth"] == other_info["depth"]):
-                if other_url not in info["siblings"]:
-                    info["siblings"].append(other_url)
+        if info["depth"]:
+            for parent_url in by_segments.get(tuple(info["segments"][:-1]), ()):
+                info["parent"] = parent_url
+                hierarchy[parent_url]["children"].append(url)
+
+    for info in hierarchy.values():
+        for child in info["children"]:
+            hierarchy[child]["siblings"] = [c for c in info["children"] if c != child]
 
     return hierarchy
 
@@ -162,101 +280,228 @@ def build_location_relationships(rows):
     return {"org_url": org_url, "location_urls": lb_urls}
 
 
-def fetch_page(url, timeout=15):
+def group_wiring_chunks(urls, hierarchy, max_size=WIRING_CHUNK_SIZE):
+    """Group block indices into graph-wiring chunks of at most max_size.
+
+    Blocks are clustered by domain and service subtree (non-service pages share a
+    site-level cluster); small clusters are packed together, large ones are split.
+    """
+    def subtree_root(url):
+        seen = set()
+        while hierarchy[url]["parent"] and url not in seen:
+            seen.add(url)
+            url = hierarchy[url]["parent"]
+        return url
+
+    clusters = {}
+    for i, url in enumerate(urls):
+        key = (extract_domain(url), subtree_root(url) if url in hierarchy else "")
+        clusters.setdefault(key, []).append(i)
+
+    chunks = []
+    current = []
+    for indices in clusters.values():
+        for start in range(0, len(indices), max_size):
+            part = indices[start:start + max_size]
+            if current and len(current) + len(part) > max_size:
+                chunks.append(current)
+                current = []
+            current.extend(part)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _page_cache():
+    """Open the on-disk page cache (created on first use)."""
+    global _PAGE_CACHE
+    if _PAGE_CACHE is None:
+        _PAGE_CACHE = Cache(PAGE_CACHE_DIR, size_limit=1 << 30)
+    return _PAGE_CACHE
+
+
+def _session():
+    """Shared requests.Session so fetches reuse keep-alive connections (created on first use).
+    The pool is sized for fetch_all's default concurrency."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+    return _SESSION
+
+
+def clear_page_cache():
+    _page_cache().clear()
+
+
+def _page_cache_key(url):
+    return f"page:v2:{url}"
+
+
+def _is_fresh(cached):
+    return time.time() - cached.get("fetched", 0) < PAGE_FRESH_FOR
+
+
+def fetch_page(url, timeout=15, force_refresh=False):
+    """Fetch and parse a page. Pages fetched within PAGE_FRESH_FOR are served from the disk
+    cache without a request; older ones are revalidated with If-None-Match /
+    If-Modified-Since and reused on 304 Not Modified."""
+    cache = _page_cache()
+    cache_key = _page_cache_key(url)
+    cached = None if force_refresh else cache.get(cache_key)
+    if cached and _is_fresh(cached):
+        return cached["data"]
+
     headers = {"User-Agent": "Mozilla/5.0 (compatible; StructuredDataBot/1.0)"}
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        resp = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        resp = _session().get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        if cached and resp.status_code == 304:
+            cache.set(cache_key, {**cached, "fetched": time.time()}, expire=PAGE_CACHE_TTL)
+            return cached["data"]
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        data = {
-            "url": url, "status": resp.status_code, "title": "", "h1": "",
-            "meta_description": "", "og_image": "", "og_site_name": "",
-            "body_text": "", "phone_numbers": [], "email_addresses": [],
-            "social_links": [], "logo_url": "", "existing_jsonld": [],
-            "internal_links": [],
-        }
-
-        if soup.title:
-            data["title"] = soup.title.get_text(strip=True)
-        h1 = soup.find("h1")
-        if h1:
-            data["h1"] = h1.get_text(strip=True)
-        meta = soup.find("meta", attrs={"name": "description"})
-        if meta and meta.get("content"):
-            data["meta_description"] = meta["content"].strip()
-        og_image = soup.find("meta", attrs={"property": "og:image"})
-        if og_image and og_image.get("content"):
-            data["og_image"] = og_image["content"]
-        og_site = soup.find("meta", attrs={"property": "og:site_name"})
-        if og_site and og_site.get("content"):
-            data["og_site_name"] = og_site["content"]
-
-        main = soup.find("main") or soup.find("article") or soup.find("body")
-        if main:
-            text = main.get_text(separator=" ", strip=True)
-            data["body_text"] = " ".join(text.split()[:500])
-
-        for a in soup.find_all("a", href=re.compile(r"^tel:")):
-            phone = a["href"].replace("tel:", "").strip()
-            if phone and phone not in data["phone_numbers"]:
-                data["phone_numbers"].append(phone)
-
-        for a in soup.find_all("a", href=re.compile(r"^mailto:")):
-            email = a["href"].replace("mailto:", "").strip().split("?")[0]
-            if email and email not in data["email_addresses"]:
-                data["email_addresses"].append(email)
-
-        social_patterns = [
-            "facebook.com", "linkedin.com", "twitter.com", "x.com",
-            "youtube.com", "instagram.com", "nextdoor.com", "bbb.org",
-            "yelp.com", "mapquest.com",
-        ]
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            for pattern in social_patterns:
-                if pattern in href and href not in data["social_links"]:
-                    data["social_links"].append(href)
-                    break
-
-        logo = soup.find("link", rel="icon")
-        if logo and logo.get("href"):
-            data["logo_url"] = logo["href"]
-            if not data["logo_url"].startswith("http"):
-                data["logo_url"] = extract_domain(url) + data["logo_url"]
-
-        for script in soup.find_all("script", type="application/ld+json"):
-            try:
-                data["existing_jsonld"].append(json.loads(script.string))
-            except (json.JSONDecodeError, TypeError):
-                pass
-
-        domain = extract_domain(url)
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if href.startswith("/"):
-                data["internal_links"].append(domain + href)
-            elif href.startswith(domain):
-                data["internal_links"].append(href)
+        data = _parse_page(url, resp.text, resp.status_code)
 
+        cache.set(cache_key, {
+            "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified"),
+            "fetched": time.time(), "data": data,
+        }, expire=PAGE_CACHE_TTL)
         return data
     except requests.RequestException as e:
         return {"url": url, "status": "error", "error": str(e)}
 
 
+def _parse_page(url, html, status):
+    tree = LexborHTMLParser(html)
+
+    data = {
+        "url": url, "status": status, "title": "", "h1": "",
+        "meta_description": "", "og_image": "", "og_site_name": "",
+        "body_text": "", "phone_numbers": [], "email_addresses": [],
+        "social_links": [], "logo_url": "", "existing_jsonld": [],
+        "internal_links": [],
+    }
+
+    title = tree.css_first("title")
+    if title:
+        data["title"] = title.text(strip=True)
+    h1 = tree.css_first("h1")
+    if h1:
+        data["h1"] = h1.text(strip=True)
+    meta = tree.css_first('meta[name="description"]')
+    if meta and meta.attributes.get("content"):
+        data["meta_description"] = meta.attributes["content"].strip()
+    og_image = tree.css_first('meta[property="og:image"]')
+    if og_image and og_image.attributes.get("content"):
+        data["og_image"] = og_image.attributes["content"]
+    og_site = tree.css_first('meta[property="og:site_name"]')
+    if og_site and og_site.attributes.get("content"):
+        data["og_site_name"] = og_site.attributes["content"]
+
+    for script in tree.css('script[type="application/ld+json"]'):
+        try:
+            data["existing_jsonld"].append(orjson.loads(script.text()))
+        except orjson.JSONDecodeError:
+            pass
+
+    # Script/style bodies are not page text; drop them before extracting it.
+    tree.strip_tags(["script", "style"])
+    main = tree.css_first("main") or tree.css_first("article") or tree.body
+    if main:
+        text = main.text(separator=" ", strip=True)
+        # maxsplit stops tokenizing after the 500 words we keep; the tail lands in one extra item
+        data["body_text"] = " ".join(text.split(None, 500)[:500])
+
+    domain = extract_domain(url)
+
+    # One pass over the anchors. Dicts act as insertion-ordered sets, so links are deduped
+    # in O(1) while keeping page order and prompts stay stable run to run.
+    phones, emails, socials, internal = {}, {}, {}, {}
+    for a in tree.css("a[href]"):
+        href = a.attributes["href"] or ""
+        if href.startswith("tel:"):
+            phone = href[4:].strip()
+            if phone:
+                phones[phone] = None
+        elif href.startswith("mailto:"):
+            email = href[7:].strip().split("?")[0]
+            if email:
+                emails[email] = None
+        else:
+            if _SOCIAL_RE.search(href):
+                socials[href] = None
+            if href.startswith(("/", domain)):
+                internal[domain + href if href[0] == "/" else href] = None
+    data["phone_numbers"] = list(phones)
+    data["email_addresses"] = list(emails)
+    data["social_links"] = list(socials)
+    data["internal_links"] = list(internal)
+
+    logo = tree.css_first('link[rel~="icon"]')
+    logo_url = logo.attributes.get("href") if logo else None
+    if logo_url:
+        data["logo_url"] = logo_url if logo_url.startswith("http") else domain + logo_url
+
+    return data
+
+
+def fetch_all(urls, concurrency=20, per_host=4, min_interval=PER_HOST_INTERVAL, force_refresh=False):
+    """Fetch pages concurrently. Yields (url, page_data) as each fetch completes.
+    Requests to one host are capped at per_host in flight and start at least
+    min_interval seconds apart; different hosts run in parallel."""
+    hosts = {url: urlparse(url).netloc for url in urls}
+    host_limits = {host: threading.BoundedSemaphore(per_host) for host in set(hosts.values())}
+    next_start = {}
+    schedule_lock = threading.Lock()
+
+    def fetch_one(url):
+        # Fresh cache hits need no request, so they skip the per-host limits entirely
+        cached = None if force_refresh else _page_cache().get(_page_cache_key(url))
+        if cached and _is_fresh(cached):
+            return cached["data"]
+        host = hosts[url]
+        with host_limits[host]:
+            # Reserve this host's next start slot, then wait for it outside the lock
+            with schedule_lock:
+                now = time.monotonic()
+                start = max(now, next_start.get(host, now))
+                next_start[host] = start + min_interval
+            if start > now:
+                time.sleep(start - now)
+            return fetch_page(url, force_refresh=force_refresh)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(fetch_one, url): url for url in hosts}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+# (page_data key, prompt label) in prompt order; list fields also carry a cap on items shown.
+_PAGE_TEXT_FIELDS = (
+    ("title", "Title"), ("h1", "H1"), ("meta_description", "Meta Description"),
+    ("og_site_name", "Site Name"), ("og_image", "OG Image"), ("logo_url", "Logo"),
+)
+_PAGE_LIST_FIELDS = (
+    ("phone_numbers", "Phone", None), ("email_addresses", "Email", None),
+    ("social_links", "Social Links", 10),
+)
+
+
 def format_page_data_for_prompt(page_data):
     if not page_data or page_data.get("status") == "error":
         return f"[Page fetch failed: {page_data.get('error', 'unknown error')}]"
     parts = [f"URL: {page_data['url']}"]
-    if page_data.get("title"): parts.append(f"Title: {page_data['title']}")
-    if page_data.get("h1"): parts.append(f"H1: {page_data['h1']}")
-    if page_data.get("meta_description"): parts.append(f"Meta Description: {page_data['meta_description']}")
-    if page_data.get("og_site_name"): parts.append(f"Site Name: {page_data['og_site_name']}")
-    if page_data.get("og_image"): parts.append(f"OG Image: {page_data['og_image']}")
-    if page_data.get("logo_url"): parts.append(f"Logo: {page_data['logo_url']}")
-    if page_data.get("phone_numbers"): parts.append(f"Phone: {', '.join(page_data['phone_numbers'])}")
-    if page_data.get("email_addresses"): parts.append(f"Email: {', '.join(page_data['email_addresses'])}")
-    if page_data.get("social_links"): parts.append(f"Social Links: {', '.join(page_data['social_links'][:10])}")
+    parts.extend(f"{label}: {value}" for key, label in _PAGE_TEXT_FIELDS if (value := page_data.get(key)))
+    parts.extend(f"{label}: {', '.join(value[:limit])}"
+                 for key, label, limit in _PAGE_LIST_FIELDS if (value := page_data.get(key)))
     if page_data.get("body_text"):
         parts.append(f"Body Text (excerpt): {page_data['body_text'][:2000]}")
     if page_data.get("existing_jsonld"):
@@ -264,6 +509,23 @@ def format_page_data_for_prompt(page_data):
     return "\n".join(parts)
 
 
+_HIERARCHY_TRAILER = (
+    "\n\nWire isRelatedTo for parent↔child. Wire isSimilarTo for siblings."
+    "\nOnly reference URLs that exist in this batch."
+)
+
+
+def format_hierarchy_for_prompt(info):
+    """Describe one service's place in the hierarchy (an entry from build_service_hierarchy)."""
+    if not info:
+        return "No service hierarchy relationships."
+    parts = [f"This service is at depth {info['depth']}."]
+    if info["parent"]: parts.append(f"Parent service: {info['parent']}")
+    if info["children"]: parts.append(f"Child services: {', '.join(info['children'])}")
+    if info["siblings"]: parts.append(f"Sibling services: {', '.join(info['siblings'])}")
+    return "\n".join(parts) + _HIERARCHY_TRAILER
+
+
 def get_csv_overrides(row):
     skip_cols = {"URL", "SchemaType", "_inferred_type", "_type_confidence",
                  "_container_type", "_nested_type", "_is_dual"}
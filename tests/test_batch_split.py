@@ -0,0 +1,40 @@
+import orjson
+
+import generator
+from generator import _split_batch_requests
+
+
+def _request(i, text="x"):
+    return {"custom_id": f"row-{i}", "params": {"messages": [{"role": "user", "content": text}]}}
+
+
+def test_everything_fits_in_one_batch():
+    requests = [_request(i) for i in range(5)]
+    assert _split_batch_requests(requests) == [requests]
+
+
+def test_no_requests_no_batches():
+    assert _split_batch_requests([]) == []
+
+
+def test_split_on_request_count(monkeypatch):
+    monkeypatch.setattr(generator, "BATCH_MAX_REQUESTS", 2)
+    requests = [_request(i) for i in range(5)]
+    chunks = _split_batch_requests(requests)
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert [r for c in chunks for r in c] == requests
+
+
+def test_split_on_bytes(monkeypatch):
+    requests = [_request(i, "y" * 100) for i in range(4)]
+    size = len(orjson.dumps(requests[0]))
+    monkeypatch.setattr(generator, "BATCH_MAX_BYTES", 2 * size)
+    chunks = _split_batch_requests(requests)
+    assert [len(c) for c in chunks] == [2, 2]
+    assert all(sum(len(orjson.dumps(r)) for r in c) <= 2 * size for c in chunks)
+
+
+def test_oversized_request_gets_its_own_batch(monkeypatch):
+    small, large = _request(0), _request(1, "z" * 1000)
+    monkeypatch.setattr(generator, "BATCH_MAX_BYTES", 500)
+    assert _split_batch_requests([small, large, small]) == [[small], [large], [small]]
@@ -0,0 +1,91 @@
+import generator
+from generator import find_wiring_violations, wire_graph_locally
+
+ORG = "https://example.com/#Organization"
+LB = "https://example.com/locations/austin#LocalBusiness"
+SVC = "https://example.com/services/repair#Service"
+SVC2 = "https://example.com/services/install#Service"
+
+
+def _messages(blocks):
+    return [message for _, message in find_wiring_violations(blocks)]
+
+
+def test_single_block_missing_reverse_edge():
+    blocks = [
+        {"@context": "https://schema.org", "@type": "Service", "@id": SVC, "isRelatedTo": [{"@id": SVC2}]},
+        {"@context": "https://schema.org", "@type": "Service", "@id": SVC2},
+    ]
+    assert any("missing isRelatedTo" in m for m in _messages(blocks))
+
+    assert wire_graph_locally(blocks) == [1]
+    assert blocks[1]["isRelatedTo"] == [{"@id": SVC}]
+    assert find_wiring_violations(blocks) == []
+
+
+def test_graph_block_wires_organization_to_local_business():
+    blocks = [{"@context": "https://schema.org", "@graph": [
+        {"@type": "Organization", "@id": ORG},
+        {"@type": "LocalBusiness", "@id": LB},
+    ]}]
+    assert _messages(blocks) == [f"Organization {ORG} does not list {LB} in subOrganization"]
+
+    assert wire_graph_locally(blocks) == [0]
+    org, lb = blocks[0]["@graph"]
+    assert org["subOrganization"] == [{"@id": LB}]
+    assert lb["parentOrganization"] == {"@id": ORG}
+    assert find_wiring_violations(blocks) == []
+
+
+def test_list_type_entities_are_checked_and_fixed():
+    blocks = [
+        {"@type": ["Organization"], "@id": ORG},
+        {"@type": ["LocalBusiness", "Dentist"], "@id": LB},
+        {"@type": ["Service", "Product"], "@id": SVC, "keywords": "repair", "telephone": "555"},
+    ]
+    messages = _messages(blocks)
+    assert f"Service {SVC} must not have 'keywords'" in messages
+    assert f"Organization {ORG} does not list {LB} in subOrganization" in messages
+
+    wire_graph_locally(blocks)
+    assert "keywords" not in blocks[2] and "telephone" not in blocks[2]
+    assert blocks[0]["subOrganization"] == [{"@id": LB}]
+    assert find_wiring_violations(blocks) == []
+
+
+def test_unrecognised_type_shape_is_reported():
+    blocks = [{"@type": {"name": "Service"}, "@id": SVC}]
+    assert _messages(blocks) == [f"{SVC} has an unrecognised @type: {{'name': 'Service'}}"]
+
+
+def test_cross_block_references_resolve():
+    blocks = [
+        {"@type": "Service", "@id": SVC, "provider": {"@id": ORG}},
+        {"@type": "Organization", "@id": ORG},
+    ]
+    assert find_wiring_violations(blocks) == []
+    assert _messages(blocks[:1]) == [f"Unresolved @id reference: {ORG}"]
+
+
+def test_external_references_are_not_reported():
+    blocks = [{"@type": "Service", "@id": SVC, "about": {"@id": "http://www.wikidata.org/entity/Q1"}}]
+    assert find_wiring_violations(blocks) == []
+
+
+def test_deprecated_properties_are_renamed_merged_or_dropped():
+    blocks = [{
+        "@type": "Service", "@id": SVC,
+        "areaServed": {"@type": "City", "name": "Austin"},
+        "serviceArea": {"@type": "City", "name": "Round Rock"},
+        "significantLink": "https://example.com/",
+    }]
+    assert wire_graph_locally(blocks) == [0]
+    assert blocks[0]["areaServed"] == [{"@type": "City", "name": "Austin"}, {"@type": "City", "name": "Round Rock"}]
+    assert "serviceArea" not in blocks[0] and "significantLink" not in blocks[0]
+    assert "relatedLink" not in blocks[0]
+
+
+def test_clean_blocks_are_left_alone():
+    blocks = [{"@type": "Organization", "@id": ORG, "name": "Example"}]
+    assert wire_graph_locally(blocks) == []
+    assert generator.find_wiring_violations(blocks) == []
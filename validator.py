@@ -4,15 +4,45 @@ Rules 1-6: Critical failures | Rules 7-12: Structural warnings | Rules 13-16: Gr
 Updated with Rule 16: Dual-type integrity checks.
 """
 
-import json
 import re
+import orjson
+import functools
+from collections import Counter
 from datetime import datetime
+from itertools import chain
 from knowledge import (
     DEPRECATED_TYPES, DEPRECATED_PROPERTIES, INVALID_PROPERTIES,
     VALID_DUAL_TYPES, INVALID_DUAL_TYPES,
-    CONTAINER_ONLY_PROPERTIES, NESTED_ONLY_PROPERTIES,
+    CONTAINER_ONLY_PROPERTIES, NESTED_ONLY_PROPERTIES, EXTERNAL_ID_PREFIXES,
 )
 
+_E164_RE = re.compile(r"^\+\d{10,15}$")
+_NON_DIGIT_RE = re.compile(r"\D")
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2})?")
+# ASCII-only case folding matches what raw_json.lower() found, without copying the payload
+_SCRIPT_TAG_RE = re.compile(r"<script", re.IGNORECASE | re.ASCII)
+
+_VALID_TYPES = frozenset({
+    "Organization", "LocalBusiness", "Service", "WebContent", "AboutPage",
+    "Person", "PostalAddress", "GeoCoordinates", "OpeningHoursSpecification",
+    "City", "Place", "AdministrativeArea", "Country", "State",
+    "OfferCatalog", "Offer", "ImageObject", "Thing",
+    "CollegeOrUniversity", "EducationalOrganization",
+    "Dentist", "LegalService", "MedicalBusiness", "ProfessionalService",
+    "AutoRepair", "HomeAndConstructionBusiness",
+})
+_MAJOR_TYPES = frozenset({"Organization", "LocalBusiness", "Service", "WebContent", "AboutPage", "Person"})
+_DATE_PROPS = ("foundingDate", "dateCreated", "dateModified", "datePublished")
+
+_STATUS_ICONS = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}
+
+# Property-name sets for the Rule 6/7 checks; isdisjoint screens an entity's keys in C
+_DEPRECATED_PROPERTY_NAMES = frozenset(DEPRECATED_PROPERTIES)
+_INVALID_PROPERTY_NAMES = {etype: frozenset(props) for etype, props in INVALID_PROPERTIES.items()}
+# Rule 16 placement sets; headline is allowed on both sides of a dual-type block
+_CONTAINER_ONLY_NAMES = frozenset(CONTAINER_ONLY_PROPERTIES) - {"headline"}
+_NESTED_ONLY_NAMES = frozenset(NESTED_ONLY_PROPERTIES)
+
 
 def validate_jsonld(raw_json, all_defined_ids=None):
     issues = []
@@ -21,12 +51,14 @@ def validate_jsonld(raw_json, all_defined_ids=None):
 
     # Rule 1: Valid JSON Syntax
     try:
-        parsed = json.loads(raw_json)
-    except json.JSONDecodeError as e:
+        parsed = orjson.loads(raw_json)
+    except orjson.JSONDecodeError as e:
         issues.append((1, "FAIL", f"Invalid JSON syntax: {e}"))
         return _result(issues, auto_fixes, None)
-
-    entities = _extract_entities(parsed)
+    # A top-level array or scalar has no @context or entities to check; stop here
+    if not isinstance(parsed, dict):
+        issues.append((1, "FAIL", f"Top-level JSON-LD must be an object, got {type(parsed).__name__}"))
+        return _result(issues, auto_fixes, None)
 
     # Rule 2: @context
     context = parsed.get("@context", "")
@@ -39,66 +71,58 @@ def validate_jsonld(raw_json, all_defined_ids=None):
         else:
             issues.append((2, "FAIL", f"@context is '{context}', expected 'https://schema.org'"))
 
-    # Rule 3: @type validity
-    valid_types = {
-        "Organization", "LocalBusiness", "Service", "WebContent", "AboutPage",
-        "Person", "PostalAddress", "GeoCoordinates", "OpeningHoursSpecification",
-        "City", "Place", "AdministrativeArea", "Country", "State",
-        "OfferCatalog", "Offer", "ImageObject", "Thing",
-        "CollegeOrUniversity", "EducationalOrganization",
-        "Dentist", "LegalService", "MedicalBusiness", "ProfessionalService",
-        "AutoRepair", "HomeAndConstructionBusiness",
-    }
+    # An empty object has nothing for the entity rules to look at
+    if not parsed:
+        return _result(issues, auto_fixes, parsed)
+
+    entities = _extract_entities(parsed)
+
+    # Rules 3-11 in one pass over the entities. Issues are appended entity by entity,
+    # so they are stably re-sorted by rule number below to keep the rule-by-rule order.
+    has_full_country = False
+    has_org = False
     for entity in entities:
         etype = entity.get("@type", "")
-        if etype and etype not in valid_types:
+
+        # Rule 3: @type validity
+        if etype and etype not in _VALID_TYPES:
             issues.append((3, "FAIL", f"Fabricated @type: '{etype}'"))
 
-    # Rule 4: @id on major entities
-    major_types = {"Organization", "LocalBusiness", "Service", "WebContent", "AboutPage", "Person"}
-    for entity in entities:
-        if entity.get("@type") in major_types and not entity.get("@id"):
-            issues.append((4, "FAIL", f"{entity.get('@type')} is missing @id"))
+        # Rule 4: @id on major entities
+        if etype in _MAJOR_TYPES and not entity.get("@id"):
+            issues.append((4, "FAIL", f"{etype} is missing @id"))
 
-    # Rule 5: No deprecated types
-    for entity in entities:
-        etype = entity.get("@type", "")
+        # Rule 5: No deprecated types
         if etype in DEPRECATED_TYPES:
             issues.append((5, "FAIL", f"Deprecated type '{etype}': {DEPRECATED_TYPES[etype]}"))
 
-    # Rule 6: No deprecated properties
-    for entity in entities:
-        for prop in entity.keys():
-            if prop in DEPRECATED_PROPERTIES:
-                issues.append((6, "FAIL",
-                    f"Deprecated property '{prop}' on {entity.get('@type', '?')}: use '{DEPRECATED_PROPERTIES[prop]}'"))
+        # Rule 6: No deprecated properties (walk keys in order only when one is present)
+        if not _DEPRECATED_PROPERTY_NAMES.isdisjoint(entity):
+            for prop in entity.keys():
+                if prop in DEPRECATED_PROPERTIES:
+                    issues.append((6, "FAIL",
+                        f"Deprecated property '{prop}' on {entity.get('@type', '?')}: use '{DEPRECATED_PROPERTIES[prop]}'"))
 
-    # Rule 7: Property-type compatibility
-    for entity in entities:
-        etype = entity.get("@type", "")
-        if etype in INVALID_PROPERTIES:
+        # Rule 7: Property-type compatibility
+        invalid = _INVALID_PROPERTY_NAMES.get(etype)
+        if invalid and not invalid.isdisjoint(entity):
             for prop in entity.keys():
-                if prop in INVALID_PROPERTIES[etype]:
+                if prop in invalid:
                     issues.append((7, "WARN", f"Property '{prop}' is not valid on @type '{etype}'"))
 
-    # Rule 8: areaServed completeness (checked at batch level)
-    # Rule 9: Country entity defined
-    has_full_country = False
-    for entity in entities:
-        addr = entity.get("address", {})
-        if isinstance(addr, dict):
-            country = addr.get("addressCountry", {})
-            if isinstance(country, dict) and country.get("@type") == "Country":
-                has_full_country = True
-                break
-    if not has_full_country and any(e.get("@type") in ("Organization", "LocalBusiness") for e in entities):
-        issues.append((9, "WARN", "Country entity not fully defined in any PostalAddress"))
+        # Rule 8: areaServed completeness (checked at batch level)
+        # Rule 9: Country entity defined (reported after the loop)
+        if not has_full_country:
+            addr = entity.get("address")
+            if isinstance(addr, dict):
+                country = addr.get("addressCountry")
+                has_full_country = isinstance(country, dict) and country.get("@type") == "Country"
+        has_org = has_org or etype in ("Organization", "LocalBusiness")
 
-    # Rule 10: Telephone format
-    for entity in entities:
+        # Rule 10: Telephone format
         phone = entity.get("telephone", "")
-        if phone and not re.match(r"^\+\d{10,15}$", phone):
-            digits = re.sub(r"\D", "", phone)
+        if phone and not _E164_RE.match(phone):
+            digits = _NON_DIGIT_RE.sub("", phone)
             if len(digits) == 10:
                 fixed = f"+1{digits}"
                 entity["telephone"] = fixed
@@ -110,25 +134,27 @@ def validate_jsonld(raw_json, all_defined_ids=None):
             else:
                 issues.append((10, "WARN", f"Phone '{phone}' is not E.164 format"))
 
-    # Rule 11: Date format
-    date_props = ["foundingDate", "dateCreated", "dateModified", "datePublished"]
-    for entity in entities:
-        for prop in date_props:
+        # Rule 11: Date format
+        for prop in _DATE_PROPS:
             val = entity.get(prop, "")
             if val and not _is_valid_date(val):
                 issues.append((11, "WARN", f"Date '{val}' for '{prop}' is not ISO 8601"))
 
+    if not has_full_country and has_org:
+        issues.append((9, "WARN", "Country entity not fully defined in any PostalAddress"))
+    issues.sort(key=lambda issue: issue[0])
+
     # Rule 12: No script tags
-    if "<script" in raw_json.lower():
+    if _SCRIPT_TAG_RE.search(raw_json):
         auto_fixes.append("Stripped <script> tags from output")
         issues.append((12, "WARN", "Output contained <script> tags (auto-removed)"))
 
-    # Rule 13: @id references resolve
-    if all_defined_ids is not None:
+    # Rule 13: @id references resolve. A payload with no "@id" key has nothing to resolve;
+    # \u escapes are the only way to spell the key without that substring.
+    if all_defined_ids is not None and ('"@id"' in raw_json or "\\u" in raw_json):
         local_ids = {e.get("@id") for e in entities if e.get("@id")}
-        combined = local_ids | all_defined_ids
         for entity in entities:
-            _check_id_refs(entity, combined, issues)
+            _check_id_refs(entity, (local_ids, all_defined_ids), issues)
 
     # Rule 14: Bidirectional relationships (checked in graph wiring pass)
     # Rule 15: Graph connectivity (checked in graph wiring pass)
@@ -144,23 +170,10 @@ def _check_dual_type_integrity(parsed, entities, issues, auto_fixes):
     if "@graph" not in parsed:
         return
 
-    major_types = {"Organization", "LocalBusiness", "Service", "WebContent", "AboutPage", "Person"}
-    major_entities = [e for e in entities if e.get("@type") in major_types]
-
-    if len(major_entities) < 2:
-        return  # Not a dual-type block
-
-    # Find container (WebContent) and nested entity
-    container = None
-    nested = None
-    for e in major_entities:
-        if e.get("@type") == "WebContent":
-            container = e
-        elif e.get("@type") in ("Service", "Person", "LocalBusiness", "Organization"):
-            nested = e
-
-    if not container or not nested:
+    roles = _dual_type_roles(tuple(e.get("@type") for e in entities))
+    if roles is None:
         return  # Not a recognized dual-type pattern
+    container, nested = entities[roles[0]], entities[roles[1]]
 
     # A. Structural checks
     if not container.get("mainEntity"):
@@ -179,19 +192,39 @@ def _check_dual_type_integrity(parsed, entities, issues, auto_fixes):
         issues.append((16, "WARN", "Dual-type: subjectOf @id doesn't match container @id"))
 
     # B. Property placement checks
+    # Walk each entity's own keys against the property sets, so warnings follow the
+    # entity's key order
     nested_type = nested.get("@type", "")
-    for prop in CONTAINER_ONLY_PROPERTIES:
-        if prop in nested and prop not in ("headline",):
+    for prop in nested:
+        if prop in _CONTAINER_ONLY_NAMES:
             # Auto-fix: flag keywords/dates on nested Service
             issues.append((16, "WARN",
                 f"Dual-type: '{prop}' should be on WebContent container, not {nested_type}"))
 
-    for prop in NESTED_ONLY_PROPERTIES:
-        if prop in container:
+    for prop in container:
+        if prop in _NESTED_ONLY_NAMES:
             issues.append((16, "WARN",
                 f"Dual-type: '{prop}' should be on {nested_type}, not WebContent container"))
 
 
+@functools.lru_cache(maxsize=512)
+def _dual_type_roles(type_signature):
+    """(container, nested) entity indices for a block's sequence of @type values, or None
+    when it isn't a dual-type block. Bulk output repeats a few shapes, so this is cached."""
+    major = [i for i, etype in enumerate(type_signature) if etype in _MAJOR_TYPES]
+    if len(major) < 2:
+        return None
+    container = nested = None
+    for i in major:
+        if type_signature[i] == "WebContent":
+            container = i
+        elif type_signature[i] in ("Service", "Person", "LocalBusiness", "Organization"):
+            nested = i
+    if container is None or nested is None:
+        return None
+    return container, nested
+
+
 def _extract_entities(parsed):
     entities = []
     if "@graph" in parsed:
@@ -208,81 +241,94 @@ def _extract_entities(parsed):
 
 
 def _is_valid_date(val):
-    return bool(re.match(r"^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2})?", val))
-
-
-def _check_id_refs(obj, known_ids, issues):
-    for key, val in obj.items():
-        if key == "@id":
-            continue
-        if isinstance(val, dict):
-            ref = val.get("@id")
-            if ref and not val.get("@type"):
-                if (not ref.startswith("http://www.wikidata.org") and
-                    not ref.startswith("https://g.co") and
-                    not ref.startswith("https://www.google.com/maps") and
-                    ref not in known_ids):
-                    issues.append((13, "WARN", f"Unresolved @id reference: {ref}"))
-            _check_id_refs(val, known_ids, issues)
-        elif isinstance(val, list):
-            for item in val:
-                if isinstance(item, dict):
-                    _check_id_refs(item, known_ids, issues)
+    return bool(_ISO_DATE_RE.match(val))
+
+
+def _check_id_refs(obj, known_id_sets, issues):
+    """Rule 13 for one entity. The id sets are checked in turn rather than unioned, which
+    would copy the batch-wide set for every row."""
+    # Depth-first over a stack of item iterators rather than recursion; descending on
+    # break and popping on exhaustion keeps the same visiting order as the recursive walk.
+    stack = [iter(obj.items())]
+    while stack:
+        for key, val in stack[-1]:
+            if key == "@id":
+                continue
+            if isinstance(val, dict):
+                ref = val.get("@id")
+                if ref and not val.get("@type"):
+                    if not ref.startswith(EXTERNAL_ID_PREFIXES) and not any(ref in ids for ids in known_id_sets):
+                        issues.append((13, "WARN", f"Unresolved @id reference: {ref}"))
+                stack.append(iter(val.items()))
+                break
+            if isinstance(val, list):
+                stack.append(chain.from_iterable(item.items() for item in val if isinstance(item, dict)))
+                break
+        else:
+            stack.pop()
 
 
 def _result(issues, auto_fixes, parsed):
-    has_fail = any(sev == "FAIL" for _, sev, _ in issues)
-    has_warn = any(sev == "WARN" for _, sev, _ in issues)
-    status = "FAIL" if has_fail else ("WARN" if has_warn else "PASS")
+    # One pass over the severities; the first FAIL settles the status
+    status = "PASS"
+    for _, sev, _ in issues:
+        if sev == "FAIL":
+            status = "FAIL"
+            break
+        if sev == "WARN":
+            status = "WARN"
     return {"status": status, "issues": issues, "auto_fixes": auto_fixes, "parsed": parsed}
 
 
 def generate_validation_report(results, rows):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     total = len(results)
-    passed = sum(1 for r in results if r["status"] == "PASS")
-    warned = sum(1 for r in results if r["status"] == "WARN")
-    failed = sum(1 for r in results if r["status"] == "FAIL")
-    dual_count = sum(1 for r in rows if r.get("_is_dual"))
-    single_count = total - dual_count
 
+    # One pass over the rows tallies statuses, fills the per-row table and collects the
+    # later sections; the summary header is put in front once the counts are known.
+    statuses = Counter()
+    row_lines = []
+    dual_lines = []
+    fix_lines = []
+    for result, row in zip(results, rows):
+        url = row.get("URL", "?")
+        stype = row.get("_inferred_type", "?")
+        status = result["status"]
+        statuses[status] += 1
+        icon = _STATUS_ICONS.get(status, "?")
+        issue_text = "; ".join(f"Rule {n}: {m}" for n, s, m in result["issues"]) if result["issues"] else "—"
+        row_lines.append(f"| {url} | {stype} | {icon} {status} | {issue_text} |")
+        if row.get("_is_dual"):
+            dual_lines.append(f"| {row['URL']} | {row['_container_type']} | {row['_nested_type']} | {row['_type_confidence']} |")
+        for fix in result.get("auto_fixes", []):
+            fix_lines.append(f"| {url} | {fix} |")
+
+    dual_count = len(dual_lines)
+    single_count = total - dual_count
     lines = [
         "# Structured Data Validation Report\n",
         f"**Generated:** {now}",
         f"**Total rows:** {total}",
-        f"**Passed:** {passed}  |  **Warnings:** {warned}  |  **Failed:** {failed}",
+        f"**Passed:** {statuses['PASS']}  |  **Warnings:** {statuses['WARN']}  |  **Failed:** {statuses['FAIL']}",
         f"**Single-type rows:** {single_count}  |  **Dual-type rows:** {dual_count}\n",
         "## Per-Row Summary\n",
         "| URL | Type(s) | Status | Issues |",
         "|-----|---------|--------|--------|",
     ]
-
-    for result, row in zip(results, rows):
-        url = row.get("URL", "?")
-        stype = row.get("_inferred_type", "?")
-        icon = {"PASS": "✅", "WARN": "⚠️", "FAIL": "❌"}.get(result["status"], "?")
-        issue_text = "; ".join(f"Rule {n}: {m}" for n, s, m in result["issues"]) if result["issues"] else "—"
-        lines.append(f"| {url} | {stype} | {icon} {result['status']} | {issue_text} |")
+    lines.extend(row_lines)
 
     # Dual-type assignments
-    dual_rows = [(row, result) for row, result in zip(rows, results) if row.get("_is_dual")]
-    if dual_rows:
+    if dual_lines:
         lines.append("\n## Dual-Type Assignments\n")
         lines.append("| URL | Container | Main Entity | Source |")
         lines.append("|-----|-----------|-------------|--------|")
-        for row, result in dual_rows:
-            lines.append(f"| {row['URL']} | {row['_container_type']} | {row['_nested_type']} | {row['_type_confidence']} |")
+        lines.extend(dual_lines)
 
     # Auto-fixes
-    all_fixes = []
-    for i, result in enumerate(results):
-        for fix in result.get("auto_fixes", []):
-            all_fixes.append((rows[i].get("URL", "?"), fix))
-    if all_fixes:
+    if fix_lines:
         lines.append("\n## Auto-Fixes Applied\n")
         lines.append("| URL | Fix |")
         lines.append("|-----|-----|")
-        for url, fix in all_fixes:
-            lines.append(f"| {url} | {fix} |")
+        lines.extend(fix_lines)
 
     return "\n".join(lines)